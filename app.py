@@ -4,36 +4,180 @@ Flask API Backend for DTM Bot
 Modern web interface for task management
 """
 
-from flask import Flask, render_template, jsonify, request, session, send_file
-from dtm_bot import DTMBot
+from flask import Flask, Response, g, render_template, jsonify, request, session, send_file
+from dtm_bot import (
+    DTMBot, DEFAULT_SESSION_CHECK_TTL, DEFAULT_CSRF_MAX_AGE, DEFAULT_TASK_PAGE_SIZE,
+    SESSION_EXPIRED, SESSION_UNKNOWN
+)
+from dtm_cache import TTLCache, DEFAULT_REFERENCE_TTL, DEFAULT_REFERENCE_MAXSIZE
+from dtm_events import EventBus, format_sse, stream_events
+from dtm_jobs import JobQueue, DEFAULT_JOB_WORKERS, DEFAULT_JOB_RETENTION
+from dtm_journal import (
+    ActionAbandoned, ActionJournal, RetryAction, public_view,
+    ACTION_DONE, DEFAULT_JOURNAL_PATH, DEFAULT_MAX_ATTEMPTS, DEFAULT_REPLAY_WORKERS
+)
+from dtm_logging import configure_logging, new_request_id, request_id_var
+from dtm_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS, observe_http
+from dtm_registry import BotRegistry, DEFAULT_BOT_IDLE_TTL, DEFAULT_MAX_BOTS
+from dtm_sessions import (
+    create_session_store, load_secret_key,
+    DEFAULT_SECRET_KEY_FILE, DEFAULT_SESSION_STORE, DEFAULT_SESSION_TTL
+)
+from dtm_store import TaskStore, DEFAULT_TASK_STORE_PATH
+from dtm_transport import TransportConfig, UpstreamUnavailable, guard_stats
 from datetime import datetime, timedelta
 import json
+import logging
 import os
+import time
 import csv
 import io
 from werkzeug.utils import secure_filename
 
+# JSON lines (or DTM_LOG_FORMAT=plain) written off the request threads
+configure_logging(
+    level=os.environ.get('DTM_LOG_LEVEL', 'info'),
+    fmt=os.environ.get('DTM_LOG_FORMAT', 'json')
+)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Shared by every worker and kept across restarts so browser sessions stay valid
+app.secret_key = load_secret_key(os.environ.get('DTM_SECRET_KEY_FILE', DEFAULT_SECRET_KEY_FILE))
+
+# Upstream cookies/CSRF token per web session, so any worker can rebuild a session's bot
+session_store = create_session_store(
+    os.environ.get('DTM_SESSION_STORE', DEFAULT_SESSION_STORE),
+    ttl=float(os.environ.get('DTM_SESSION_TTL', DEFAULT_SESSION_TTL))
+)
+
+# Bot instance will be stored per session; idle bots are closed in the background
+bots = BotRegistry(
+    idle_ttl=float(os.environ.get('DTM_BOT_IDLE_TTL', DEFAULT_BOT_IDLE_TTL)),
+    max_size=int(os.environ.get('DTM_MAX_BOTS', DEFAULT_MAX_BOTS))
+)
+bots.start_reaper()
+
+# Seconds a successful DTM session probe is reused before /home is checked again
+SESSION_CHECK_TTL = float(os.environ.get('DTM_SESSION_CHECK_TTL', DEFAULT_SESSION_CHECK_TTL))
+
+# Seconds a scraped CSRF token is reused (it is also refreshed on a 419/token mismatch)
+CSRF_MAX_AGE = float(os.environ.get('DTM_CSRF_MAX_AGE', DEFAULT_CSRF_MAX_AGE))
+
+# Task types/projects/categories/activities shared by all bots of the same account
+REFERENCE_CACHE = TTLCache(
+    maxsize=int(os.environ.get('DTM_REFERENCE_CACHE_SIZE', DEFAULT_REFERENCE_MAXSIZE)),
+    ttl=float(os.environ.get('DTM_REFERENCE_TTL', DEFAULT_REFERENCE_TTL))
+)
+
+# Background jobs (bulk uploads); polled through /api/jobs/<id>
+jobs = JobQueue(
+    max_workers=int(os.environ.get('DTM_JOB_WORKERS', DEFAULT_JOB_WORKERS)),
+    retention=float(os.environ.get('DTM_JOB_RETENTION', DEFAULT_JOB_RETENTION))
+)
+
+# Per-session event channels streamed to the browser over /api/events
+events = EventBus()
+
+# Start/pause/resume/end are journalled on disk and replayed to DTM in the background
+journal = ActionJournal(
+    os.environ.get('DTM_ACTION_JOURNAL', DEFAULT_JOURNAL_PATH),
+    max_attempts=int(os.environ.get('DTM_ACTION_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+)
+
+# Time format of end/pause/resume datetimes, as the bot expects them
+ACTION_TIME_FORMAT = '%Y-%m-%d %I:%M %p'
+
+# Seconds between SSE keep-alives, and between server-side session checks on an open stream
+SSE_HEARTBEAT = 15.0
+SSE_SESSION_CHECK_INTERVAL = float(os.environ.get('DTM_SSE_SESSION_CHECK_INTERVAL', 300))
+# Most open /api/events streams per process; each holds a gthread thread, so
+# gunicorn.conf.py sizes this below DTM_THREADS to keep threads for other requests
+SSE_MAX_STREAMS = int(os.environ.get('DTM_MAX_EVENT_STREAMS', 16))
+# Seconds a browser turned away at the stream cap is told to wait
+SSE_RETRY_AFTER = 30
+
+# Look-back window for /api/tasks/ongoing (overridable per request with ?days=)
+ONGOING_LOOKBACK_DAYS = 7
+MAX_ONGOING_LOOKBACK_DAYS = 31
+
+# Paging for /api/tasks (rows per myTaskList page)
+MAX_TASK_PAGE_SIZE = 500
 
-# Bot instance will be stored per session
-bots = {}
+# Most sub-operations accepted by one /api/batch call
+MAX_BATCH_OPS = 20
+
+# Most tasks changed by one /api/tasks/bulk-action call
+MAX_BULK_TASKS = 100
+
+# Longest range /api/calendar serves in one call (a month grid shows 42 days)
+MAX_CALENDAR_DAYS = 62
+
+# FullCalendar event colours per task status
+CALENDAR_COLORS = {
+    'ongoing': '#6366f1',
+    'paused': '#f59e0b',
+    'completed': '#10b981',
+    'unknown': '#94a3b8'
+}
+
+# Local task history; closed past days are served from here instead of DTM
+task_store = TaskStore(os.environ.get('DTM_TASK_STORE', DEFAULT_TASK_STORE_PATH))
+
+# Upstream HTTP pool/timeout/retry settings shared by every bot, plus the
+# process-wide rate limit and circuit breaker for the DTM server
+TRANSPORT_CONFIG = TransportConfig(
+    pool_maxsize=int(os.environ.get('DTM_HTTP_POOL_SIZE', 16)),
+    connect_timeout=float(os.environ.get('DTM_HTTP_CONNECT_TIMEOUT', 5)),
+    read_timeout=float(os.environ.get('DTM_HTTP_READ_TIMEOUT', 30)),
+    max_retries=int(os.environ.get('DTM_HTTP_MAX_RETRIES', 3)),
+    rate_limit=float(os.environ.get('DTM_RATE_LIMIT', 20)),
+    rate_burst=int(os.environ.get('DTM_RATE_BURST', 40)),
+    max_in_flight=int(os.environ.get('DTM_MAX_IN_FLIGHT', 32)),
+    breaker_threshold=int(os.environ.get('DTM_BREAKER_THRESHOLD', 5)),
+    breaker_reset=float(os.environ.get('DTM_BREAKER_RESET', 30)),
+    slow_call=float(os.environ.get('DTM_SLOW_CALL', 15))
+)
+
+def new_bot():
+    return DTMBot(
+        session_check_ttl=SESSION_CHECK_TTL,
+        transport_config=TRANSPORT_CONFIG,
+        csrf_max_age=CSRF_MAX_AGE,
+        reference_cache=REFERENCE_CACHE
+    )
+
+def load_bot(session_id):
+    """This worker's bot for a session, rebuilt from the session store if needed"""
+    bot = bots.get(session_id)
+    if bot is not None or not session_id:
+        return bot
+    
+    state = session_store.get(session_id)
+    if state is None:
+        return None
+    bot = new_bot()
+    bot.restore_state(state)
+    logger.info("Restored DTM session %s from the session store", session_id)
+    return bots.put(session_id, bot)
 
 def get_bot():
     """Get or create bot instance for current session"""
     session_id = session.get('session_id')
-    if session_id and session_id in bots:
-        bot = bots[session_id]
-        # Check if DTM session is still valid
-        if not bot.is_session_valid():
-            print(f"  DTM session invalid, clearing session {session_id}")
-            try:
-                del bots[session_id]
-            except KeyError:
-                # Session already cleared by another concurrent request
-                pass
+    bot = load_bot(session_id)
+    if bot is not None:
+        # Check if DTM session is still valid (cached for SESSION_CHECK_TTL seconds);
+        # only log out when DTM showed its login page, not when it failed to answer
+        if bot.check_session() == SESSION_EXPIRED:
+            logger.info("DTM session invalid, clearing session %s", session_id)
+            bots.remove(session_id)
+            session_store.delete(session_id)
             session.clear()
+            # Let other open tabs of this session know as well
+            events.publish(session_id, 'session-expired', {})
             return None
+        # Saved again after the request if the cookies or CSRF token change
+        g.bot_session = (session_id, bot, bot_fingerprint(bot))
         return bot
     return None
 
@@ -41,8 +185,140 @@ def create_bot():
     """Create new bot instance"""
     session_id = os.urandom(16).hex()
     session['session_id'] = session_id
-    bots[session_id] = DTMBot()
-    return bots[session_id]
+    return bots.put(session_id, new_bot())
+
+def bot_fingerprint(bot):
+    """The parts of a bot's state worth persisting, for change detection"""
+    return (
+        bot.username,
+        bot.csrf_token,
+        tuple(sorted((c.domain, c.path, c.name, c.value) for c in bot.session.cookies))
+    )
+
+def save_bot(session_id, bot):
+    """Persist a bot's login state so other workers (and restarts) can rebuild it"""
+    try:
+        session_store.set(session_id, bot.export_state())
+    except Exception as e:
+        logger.warning("Could not save session %s: %s", session_id, e)
+
+def collect_metrics():
+    """Scrape-time metric families from the caches, bot registry, jobs and upstream guards"""
+    cache = REFERENCE_CACHE.stats()
+    yield 'dtm_reference_cache_hits_total', 'counter', 'Reference data cache hits', [({}, cache['hits'])]
+    yield 'dtm_reference_cache_misses_total', 'counter', 'Reference data cache misses', [({}, cache['misses'])]
+    yield 'dtm_reference_cache_coalesced_total', 'counter', 'Reference data loads that joined one already in flight', [({}, cache['coalesced'])]
+    yield 'dtm_reference_cache_evictions_total', 'counter', 'Reference data cache LRU evictions', [({}, cache['evictions'])]
+    yield 'dtm_reference_cache_entries', 'gauge', 'Reference data cache entries', [({}, cache['size'])]
+    yield 'dtm_reference_cache_hit_ratio', 'gauge', 'Reference data cache hits per lookup since start', [({}, cache['hit_rate'])]
+
+    registry = bots.stats()
+    yield 'dtm_bots_live', 'gauge', 'Logged-in DTM clients held by this process', [({}, registry['live'])]
+    yield 'dtm_bots_closed_total', 'counter', 'DTM clients closed by reason', [
+        ({'reason': reason}, registry[reason]) for reason in ('evicted', 'expired', 'removed')
+    ]
+
+    yield 'dtm_jobs', 'gauge', 'Background jobs by state', [
+        ({'state': state}, count) for state, count in jobs.stats().items()
+    ]
+    yield 'dtm_actions', 'gauge', 'Journalled task actions by state', [
+        ({'state': state}, count) for state, count in journal.stats().items()
+    ]
+    yield 'dtm_sse_subscribers', 'gauge', 'Open /api/events streams', [({}, events.subscriber_count())]
+
+    upstream = guard_stats().values()
+    yield 'dtm_upstream_circuit_open', 'gauge', '1 while the circuit breaker rejects calls to the origin', [
+        ({'origin': guard['origin']}, 0 if guard['circuit'] == 'closed' else 1) for guard in upstream
+    ]
+    yield 'dtm_upstream_in_flight', 'gauge', 'DTM requests currently outstanding', [
+        ({'origin': guard['origin']}, guard['in_flight']) for guard in upstream
+    ]
+    for key, documentation in (
+        ('circuit_trips', 'Times the circuit breaker opened'),
+        ('rejected', 'Calls refused by the circuit breaker or rate limiter'),
+        ('throttled', 'Calls delayed by the rate limiter')
+    ):
+        yield f'dtm_upstream_{key}_total', 'counter', documentation, [
+            ({'origin': guard['origin']}, guard[key]) for guard in upstream
+        ]
+
+METRICS.add_collector(collect_metrics)
+
+@app.before_request
+def start_request():
+    """Start the request timer and tag the request's log records with its ID"""
+    g.request_started = time.perf_counter()
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+    g.request_id_token = request_id_var.set(g.request_id)
+
+@app.teardown_request
+def end_request(error=None):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        request_id_var.reset(token)
+
+@app.after_request
+def record_request_metrics(response):
+    """Time every request by URL rule (so /api/tasks/end/<task_id> is one series) and echo its ID"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        observe_http(rule, request.method, time.perf_counter() - started, response.status_code)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.after_request
+def persist_bot_session(response):
+    """Save the request's bot state if upstream rotated cookies or the CSRF token"""
+    bot_session = g.pop('bot_session', None)
+    if bot_session is not None:
+        session_id, bot, fingerprint = bot_session
+        if bot.username and bot_fingerprint(bot) != fingerprint:
+            save_bot(session_id, bot)
+    return response
+
+def reopen_task_day(bot, started):
+    """Make the store re-fetch the day a task was just started on (it may be a closed past day)"""
+    if bot.username and started.started_at:
+        task_store.reopen_day(bot.username, started.started_at[:10])
+
+def serialize_tasks(result, include_raw=False):
+    """JSON-ready copy of a bot task listing (TaskRow objects become compact dicts)"""
+    return {
+        **result,
+        'tasks': [task.to_dict(include_raw) for task in result.get('tasks', [])]
+    }
+
+def calendar_event(day, task):
+    """FullCalendar event object for one task listed on day"""
+    event = {
+        'id': task.uuid or f"{day}#{task.index}",
+        'title': task.description or task.task_type or 'Task',
+        'color': CALENDAR_COLORS[task.status.value],
+        'extendedProps': {
+            'taskId': task.uuid or task.index,
+            'day': day,
+            'status': task.status.value,
+            'project': task.category,
+            'description': task.description
+        }
+    }
+    if task.start:
+        event['start'] = task.start.isoformat()
+        if task.end:
+            event['end'] = task.end.isoformat()
+    else:
+        event['start'] = day
+        event['allDay'] = True
+    return event
+
+@app.errorhandler(UpstreamUnavailable)
+def upstream_unavailable(e):
+    """DTM is down, too slow or rate limited: fail fast and keep the user logged in"""
+    response = jsonify({'success': False, 'message': str(e), 'upstream_unavailable': True})
+    response.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.5)))
+    return response, 503
 
 @app.route('/')
 def index():
@@ -62,6 +338,7 @@ def login():
     bot = create_bot()
     
     if bot.login(username, password):
+        save_bot(session['session_id'], bot)
         return jsonify({
             'success': True,
             'message': 'Login successful',
@@ -77,8 +354,9 @@ def login():
 def logout():
     """Logout endpoint"""
     session_id = session.get('session_id')
-    if session_id and session_id in bots:
-        del bots[session_id]
+    bots.remove(session_id)
+    if session_id:
+        session_store.delete(session_id)
     session.clear()
     return jsonify({'success': True, 'message': 'Logged out'})
 
@@ -122,116 +400,260 @@ def get_activities(project_id, category_id):
     activities = bot.get_activities(project_id, category_id)
     return jsonify({'success': True, 'data': activities})
 
-@app.route('/api/tasks/start', methods=['POST'])
-def start_task():
-    """Start a new task"""
+@app.route('/api/reference-data/refresh', methods=['POST'])
+def refresh_reference_data():
+    """Drop cached task types, projects, categories and activities for this account"""
     bot = get_bot()
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
-    data = request.json
-    
-    success = bot.start_task(
-        task_type_id=data.get('task_type_id'),
-        project_id=data.get('project_id'),
-        task_description=data.get('description'),
-        category_id=data.get('category_id'),
-        activity_id=data.get('activity_id'),
-        bug_id=data.get('bug_id'),
-        start_datetime=data.get('start_datetime')
-    )
-    
-    if success:
-        return jsonify({
-            'success': True,
-            'message': 'Task started successfully'
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'message': 'Failed to start task'
-        }), 400
+    removed = bot.invalidate_reference_data()
+    return jsonify({'success': True, 'removed': removed})
 
-@app.route('/api/tasks/end/<task_id>', methods=['POST'])
-def end_task(task_id):
-    """End a task"""
+def queue_task_action(bot, kind, payload, task_id=None):
+    """Journal a task action for the current session and answer 202 straight away"""
+    action = journal.enqueue(session.get('session_id'), bot.username, kind, payload, task_id)
+    return jsonify({
+        'success': True,
+        'queued': True,
+        'message': f'Task {kind} queued',
+        **public_view(action)
+    }), 202
+
+def action_time(value):
+    """The intended time of an action, frozen now: the given "YYYY-MM-DD HH:MM AM/PM" or the current minute"""
+    if not value:
+        return datetime.now().strftime(ACTION_TIME_FORMAT)
+    return datetime.strptime(value, ACTION_TIME_FORMAT).strftime(ACTION_TIME_FORMAT)
+
+@app.route('/api/tasks/start', methods=['POST'])
+def start_task():
+    """Queue a new task start (sent to DTM in the background)"""
     bot = get_bot()
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
     data = request.json or {}
-    end_datetime = data.get('end_datetime')
-    
-    success = bot.end_task(task_id, end_datetime)
+    if not (data.get('task_type_id') and data.get('project_id') and data.get('description')):
+        return jsonify({'success': False, 'message': 'Task type, project and description are required'}), 400
+    try:
+        started_at = datetime.fromisoformat(data['start_datetime']) if data.get('start_datetime') else datetime.now()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid start date/time'}), 400
     
-    if success:
-        return jsonify({
-            'success': True,
-            'message': 'Task ended successfully'
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'message': 'Failed to end task'
-        }), 400
+    return queue_task_action(bot, 'start', {
+        'task_type_id': data['task_type_id'],
+        'project_id': data['project_id'],
+        'task_description': data['description'],
+        'category_id': data.get('category_id'),
+        'activity_id': data.get('activity_id'),
+        'bug_id': data.get('bug_id'),
+        'start_datetime': started_at.isoformat(timespec='seconds')
+    })
 
-@app.route('/api/tasks/pause/<task_id>', methods=['POST'])
-def pause_task(task_id):
-    """Pause a task"""
+def queue_status_change(kind, task_id, value):
     bot = get_bot()
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
-    
-    data = request.json or {}
-    pause_datetime = data.get('pause_datetime')
-    
-    success = bot.pause_task(task_id, pause_datetime)
-    
-    if success:
-        return jsonify({
-            'success': True,
-            'message': 'Task paused successfully'
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'message': 'Failed to pause task'
-        }), 400
+    try:
+        when = action_time(value)
+    except ValueError:
+        return jsonify({'success': False, 'message': f'Invalid {kind} date/time'}), 400
+    return queue_task_action(bot, kind, {'when': when}, task_id)
+
+@app.route('/api/tasks/end/<task_id>', methods=['POST'])
+def end_task(task_id):
+    """Queue ending a task"""
+    return queue_status_change('end', task_id, (request.get_json(silent=True) or {}).get('end_datetime'))
+
+@app.route('/api/tasks/pause/<task_id>', methods=['POST'])
+def pause_task(task_id):
+    """Queue pausing a task"""
+    return queue_status_change('pause', task_id, (request.get_json(silent=True) or {}).get('pause_datetime'))
 
 @app.route('/api/tasks/resume/<task_id>', methods=['POST'])
 def resume_task(task_id):
-    """Resume a paused task"""
+    """Queue resuming a paused task"""
+    return queue_status_change('resume', task_id, (request.get_json(silent=True) or {}).get('resume_datetime'))
+
+@app.route('/api/tasks/bulk-action', methods=['POST'])
+def bulk_task_action():
+    """
+    Pause, resume or end several tasks at once (e.g. closing every open task at the end of the day)
+
+    Body: {"action": "end", "task_ids": [...], "datetime": "YYYY-MM-DD HH:MM AM/PM" (optional)}
+    The changes are sent to DTM concurrently and reported per task. Tasks DTM
+    cannot take right now, or every task while this session still has
+    journalled actions waiting (so they stay in order), are queued instead.
+    """
     bot = get_bot()
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
-    data = request.json or {}
-    resume_datetime = data.get('resume_datetime')
-    
-    success = bot.resume_task(task_id, resume_datetime)
+    data = request.get_json(silent=True) or {}
+    kind = data.get('action')
+    if kind not in ('end', 'pause', 'resume'):
+        return jsonify({'success': False, 'message': 'action must be end, pause or resume'}), 400
+    task_ids = data.get('task_ids')
+    if not isinstance(task_ids, list) or not task_ids or not all(isinstance(t, str) and t for t in task_ids):
+        return jsonify({'success': False, 'message': 'task_ids must be a non-empty list of task IDs'}), 400
+    task_ids = list(dict.fromkeys(task_ids))
+    if len(task_ids) > MAX_BULK_TASKS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BULK_TASKS} tasks per call'}), 400
+    try:
+        when = action_time(data.get('datetime'))
+    except ValueError:
+        return jsonify({'success': False, 'message': f'Invalid {kind} date/time'}), 400
     
-    if success:
-        return jsonify({
-            'success': True,
-            'message': 'Task resumed successfully'
-        })
+    session_id = session.get('session_id')
+    if journal.pending(session_id):
+        results = [
+            {'task_id': task_id, 'status': kind, 'success': False, 'retryable': True}
+            for task_id in task_ids
+        ]
     else:
-        return jsonify({
-            'success': False,
-            'message': 'Failed to resume task'
-        }), 400
+        results = bot.update_tasks(task_ids, kind, when)
+    
+    # Anything DTM did not refuse outright (circuit open, network error, 5xx) is retried from the journal
+    for result in results:
+        if result.pop('retryable', False):
+            action = journal.enqueue(session_id, bot.username, kind, {'when': when}, result['task_id'])
+            result.update(queued=True, action_id=action['id'], message=f'Task {kind} queued')
+    
+    for result in results:
+        if result['success']:
+            task_store.reopen_task(bot.username, result['task_id'], when[:10])
+    succeeded = sum(1 for result in results if result['success'])
+    queued = sum(1 for result in results if result.get('queued'))
+    failed = len(results) - succeeded - queued
+    if succeeded:
+        events.publish(session_id, 'task', {'action': kind, 'task_ids': [
+            result['task_id'] for result in results if result['success']
+        ]})
+    
+    return jsonify({
+        'success': failed == 0,
+        'action': kind,
+        'when': when,
+        'results': results,
+        'succeeded': succeeded,
+        'failed': failed,
+        'queued': queued
+    })
+
+@app.route('/api/actions', methods=['GET'])
+def get_pending_actions():
+    """This session's task actions not yet sent to DTM, in replay order"""
+    session_id = session.get('session_id')
+    if not session_id:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    return jsonify({'success': True, 'actions': [public_view(a) for a in journal.pending(session_id)]})
+
+@app.route('/api/actions/<action_id>', methods=['GET'])
+def get_action(action_id):
+    """Replay status of one queued task action"""
+    action = journal.get(action_id, session_id=session.get('session_id'))
+    if not action:
+        return jsonify({'success': False, 'message': 'Action not found'}), 404
+    return jsonify({'success': True, **public_view(action)})
+
+def replay_start(bot, payload, retried):
+    """Start a journalled task, first checking whether an earlier attempt already got through"""
+    started_at = datetime.fromisoformat(payload['start_datetime'])
+    if retried:
+        task_id = bot.find_task_id(payload['task_description'], started_at)
+        if task_id:
+            return {'success': True, 'task_id': task_id, 'started_at': payload['start_datetime']}
+    if not bot.task_types:
+        # The task type name is sent along with its ID
+        bot.get_task_types()
+    started = bot.start_task(**payload)
+    return {
+        'success': bool(started),
+        'task_id': started.task_id,
+        'started_at': started.started_at,
+        'message': started.message
+    }
+
+def replay_action(action):
+    """Send one journalled action to DTM (runs on a journal replay worker)"""
+    session_id = action['session_id']
+    bot = load_bot(session_id)
+    if bot is None:
+        raise ActionAbandoned('Logged out before the action reached DTM')
+    bots.touch(session_id)
+    fingerprint = bot_fingerprint(bot)
+    payload = action['payload']
+    try:
+        state = bot.check_session()
+        if state == SESSION_EXPIRED:
+            raise ActionAbandoned('DTM session expired before the action reached DTM')
+        if state == SESSION_UNKNOWN:
+            raise RetryAction('Could not reach DTM to check the session', count_attempt=True)
+        if action['kind'] == 'start':
+            result = replay_start(bot, payload, retried=action['attempts'] > 0)
+            if result['success']:
+                task_store.reopen_day(bot.username, payload['start_datetime'][:10])
+            return result
+        outcome = bot.update_task_status(action['task_id'], action['kind'], payload['when'])
+        if outcome['success']:
+            task_store.reopen_task(bot.username, action['task_id'], payload['when'][:10])
+            return {'success': True, 'task_id': action['task_id']}
+        if outcome['retryable']:
+            raise RetryAction(outcome['message'], count_attempt=True)
+        # DTM answered and refused (unknown or already ended task, bad time...): retrying cannot help
+        raise ActionAbandoned(outcome['message'])
+    except UpstreamUnavailable as e:
+        raise RetryAction(str(e), e.retry_after)
+    finally:
+        if bot.username and bot_fingerprint(bot) != fingerprint:
+            save_bot(session_id, bot)
+
+def publish_action_update(action):
+    """Push an action's new state to the session's tabs; a sent action also changes a task"""
+    events.publish(action['session_id'], 'action', public_view(action))
+    if action['status'] == ACTION_DONE:
+        task_id = action['result'].get('task_id') or action['task_id']
+        events.publish(action['session_id'], 'task', {'action': action['kind'], 'task_id': task_id})
+
+journal.start(
+    replay_action,
+    on_update=publish_action_update,
+    workers=int(os.environ.get('DTM_REPLAY_WORKERS', DEFAULT_REPLAY_WORKERS))
+)
 
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    """Get tasks for a specific date"""
+    """Get one page of tasks for a specific date (?start=&length= for paging, ?refresh=1 to bypass the store)"""
     bot = get_bot()
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
     search_date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    include_raw = request.args.get('raw', type=int) == 1
+    start = max(0, request.args.get('start', 0, type=int))
+    length = request.args.get('length', DEFAULT_TASK_PAGE_SIZE, type=int)
+    length = max(1, min(length, MAX_TASK_PAGE_SIZE))
+    refresh = request.args.get('refresh', type=int) == 1
     
-    result = bot.get_my_tasks(search_date)
-    return jsonify(result)
+    if include_raw:
+        # Raw rows are not stored, so debugging requests always go upstream
+        result = bot.get_my_tasks(search_date, include_raw=True, start=start, length=length)
+    else:
+        result = task_page(bot, search_date, start, length, refresh)
+    return jsonify(serialize_tasks(result, include_raw))
+
+def task_page(bot, search_date, start=0, length=DEFAULT_TASK_PAGE_SIZE, refresh=False):
+    """One page of a day's tasks, served from the task store (synced upstream first if refresh)"""
+    result = task_store.get_day(bot, search_date, refresh=refresh)
+    if result.get('success'):
+        result = {
+            **result,
+            'tasks': result['tasks'][start:start + length],
+            'start': start,
+            'length': length
+        }
+    return result
 
 @app.route('/api/tasks/ongoing', methods=['GET'])
 def get_ongoing_tasks():
@@ -240,34 +662,180 @@ def get_ongoing_tasks():
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
 
-    # Check the last 7 days for ongoing tasks (since tasks can span multiple days)
-    ongoing_tasks = []
-    today = datetime.now()
-
-    for days_back in range(7):  # Check last 7 days
-        check_date = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        result = bot.get_my_tasks(check_date)
-
-        if result and result.get('success'):
-            if result.get('raw_response') and result['raw_response'].get('data'):
-                for task_row in result['raw_response']['data']:
-                    # Check if task status contains "On Going", "Pause", or "On Hold"
-                    if len(task_row) > 8:  # Ensure we have status field
-                        status = task_row[8] if isinstance(task_row[8], str) else ''
-                        status_lower = status.lower()
-                        if 'on going' in status_lower or 'pause' in status_lower or 'on hold' in status_lower or 'hold' in status_lower:
-                            # Avoid duplicates by checking task ID
-                            task_id = task_row[0] if len(task_row) > 0 else None
-                            if task_id and not any(t[0] == task_id for t in ongoing_tasks):
-                                ongoing_tasks.append(task_row)
+    # Tasks can span multiple days, so look back over a window (default 7 days)
+    days = request.args.get('days', ONGOING_LOOKBACK_DAYS, type=int)
+    days = max(1, min(days, MAX_ONGOING_LOOKBACK_DAYS))
 
+    include_raw = request.args.get('raw', type=int) == 1
+    
+    if include_raw:
+        result = bot.get_ongoing_tasks(days)
+    else:
+        result = task_store.get_ongoing(bot, days)
+    return jsonify(serialize_tasks(result, include_raw))
+
+@app.route('/api/calendar', methods=['GET'])
+def get_calendar():
+    """Per-day summaries and task events for a date range (?from=&to=, inclusive; ?refresh=1 to bypass the store)"""
+    bot = get_bot()
+    if not bot:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    
+    try:
+        date_from = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d')
+        date_to = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'from and to must be YYYY-MM-DD dates'}), 400
+    span = (date_to - date_from).days + 1
+    if span < 1 or span > MAX_CALENDAR_DAYS:
+        return jsonify({
+            'success': False,
+            'message': f'Date range must cover 1 to {MAX_CALENDAR_DAYS} days'
+        }), 400
+    
+    dates = [(date_from + timedelta(days=n)).strftime('%Y-%m-%d') for n in range(span)]
+    # Nothing can be logged in the future, so only fetch up to today
+    today = datetime.now().strftime('%Y-%m-%d')
+    results = task_store.get_days(
+        bot,
+        [date for date in dates if date <= today],
+        refresh=request.args.get('refresh', type=int) == 1
+    )
+    
+    days = {}
+    calendar_events = []
+    seen = set()
+    failed_dates = []
+    for date in dates:
+        result = results.get(date)
+        if result is None:
+            continue
+        if not result.get('success'):
+            failed_dates.append(date)
+            continue
+        tasks = result['tasks']
+        days[date] = {
+            'count': len(tasks),
+            'open': sum(1 for task in tasks if task.is_open),
+            'total_hours': result.get('total_hours', '0:00'),
+            'seconds': sum(task.duration_seconds or 0 for task in tasks)
+        }
+        for task in tasks:
+            # A task spanning several days is listed on each of them
+            event = calendar_event(date, task)
+            if event['id'] not in seen:
+                seen.add(event['id'])
+                calendar_events.append(event)
+    
+    return jsonify({
+        'success': len(failed_dates) < len(results) or not results,
+        'from': dates[0],
+        'to': dates[-1],
+        'days': days,
+        'events': calendar_events,
+        'failed_dates': failed_dates
+    })
+
+def batch_int(params, name, default, low, high):
+    """Integer batch parameter clamped to [low, high]"""
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(low, min(value, high))
+
+# Read-only /api/batch operations: name -> (required params, handler(bot, params) -> JSON body)
+BATCH_OPERATIONS = {
+    'task-types': ((), lambda bot, p: {'success': True, 'data': bot.get_task_types()}),
+    'projects': ((), lambda bot, p: {'success': True, 'data': bot.get_projects()}),
+    'categories': (('project_id',), lambda bot, p: {
+        'success': True, 'data': bot.get_categories(p['project_id'])
+    }),
+    'activities': (('project_id', 'category_id'), lambda bot, p: {
+        'success': True, 'data': bot.get_activities(p['project_id'], p['category_id'])
+    }),
+    'tasks': ((), lambda bot, p: serialize_tasks(task_page(
+        bot,
+        p.get('date') or datetime.now().strftime('%Y-%m-%d'),
+        batch_int(p, 'start', 0, 0, 10 ** 6),
+        batch_int(p, 'length', DEFAULT_TASK_PAGE_SIZE, 1, MAX_TASK_PAGE_SIZE)
+    ))),
+    'ongoing': ((), lambda bot, p: serialize_tasks(task_store.get_ongoing(
+        bot, batch_int(p, 'days', ONGOING_LOOKBACK_DAYS, 1, MAX_ONGOING_LOOKBACK_DAYS)
+    ))),
+}
+
+def run_batch_operation(bot, op):
+    """Run one /api/batch sub-operation; failures become that operation's result"""
+    try:
+        return op['handler'](bot, op['params'])
+    except UpstreamUnavailable as e:
+        return {'success': False, 'message': str(e), 'upstream_unavailable': True}
+    except Exception as e:
+        logger.exception("Batch operation %s failed: %s", op['name'], e)
+        return {'success': False, 'message': f"{op['name']} failed"}
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """
+    Run several read-only operations in one round-trip
+
+    Body: {"ops": [{"op": "projects"}, {"op": "tasks", "date": "2025-11-13"}, ...]}
+    Each entry may carry an "id" (default: its op name) under which its
+    result is returned; results have the same shape as the single endpoints.
+    The session is checked once and the operations run concurrently.
+    """
+    bot = get_bot()
+    if not bot:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    
+    entries = (request.get_json(silent=True) or {}).get('ops')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'success': False, 'message': 'ops must be a non-empty list'}), 400
+    if len(entries) > MAX_BATCH_OPS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BATCH_OPS} operations per batch'}), 400
+    
+    ops = []
+    for entry in entries:
+        name = entry.get('op') if isinstance(entry, dict) else None
+        if name not in BATCH_OPERATIONS:
+            return jsonify({'success': False, 'message': f'Unknown operation: {name}'}), 400
+        required, handler = BATCH_OPERATIONS[name]
+        missing = [param for param in required if not entry.get(param)]
+        if missing:
+            return jsonify({'success': False, 'message': f"{name} needs {', '.join(missing)}"}), 400
+        op_id = str(entry.get('id') or name)
+        if any(op['id'] == op_id for op in ops):
+            return jsonify({'success': False, 'message': f'Duplicate operation id: {op_id}'}), 400
+        ops.append({'id': op_id, 'name': name, 'params': entry, 'handler': handler})
+    
+    results = bot.map_concurrent(lambda op: run_batch_operation(bot, op), ops)
     return jsonify({
         'success': True,
-        'tasks': ongoing_tasks,
-        'count': len(ongoing_tasks),
-        'checked_days': 7
+        'results': {op['id']: result for op, result in zip(ops, results)}
     })
 
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Service health: upstream circuit state plus cache, bot and job counters"""
+    upstream = guard_stats()
+    degraded = any(guard['circuit'] != 'closed' for guard in upstream.values())
+    return jsonify({
+        'success': True,
+        'status': 'degraded' if degraded else 'ok',
+        'upstream': upstream,
+        'bots': bots.stats(),
+        'jobs': jobs.stats(),
+        'actions': journal.stats(),
+        'reference_cache': REFERENCE_CACHE.stats(),
+        'task_store': task_store.stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (this worker's counters only)"""
+    return Response(METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Check login status"""
@@ -331,9 +899,98 @@ def download_csv_template():
         download_name='dtm_tasks_template.csv'
     )
 
+def resolve_categories_and_activities(bot, tasks):
+    """
+    Fill in category_id/activity_id for parsed CSV rows
+    
+    Each distinct project's categories and each distinct (project, category)
+    pair's activities are fetched once, concurrently, and the name -> id
+    tables are reused for every row.
+    """
+    project_ids = sorted({t['project_id'] for t in tasks if t['category_name']})
+    category_lists = bot.map_concurrent(bot.get_categories, project_ids)
+    category_maps = {
+        project_id: {c['name'].lower(): c['id'] for c in categories}
+        for project_id, categories in zip(project_ids, category_lists)
+    }
+    
+    for task in tasks:
+        if task['category_name']:
+            task['category_id'] = category_maps[task['project_id']].get(task['category_name'])
+    
+    pairs = sorted({
+        (t['project_id'], t['category_id'])
+        for t in tasks if t['activity_name'] and t['category_id']
+    })
+    activity_lists = bot.map_concurrent(lambda pair: bot.get_activities(*pair), pairs)
+    activity_maps = {
+        pair: {a['name'].lower(): a['id'] for a in activities}
+        for pair, activities in zip(pairs, activity_lists)
+    }
+    
+    for task in tasks:
+        if task['activity_name'] and task['category_id']:
+            pair = (task['project_id'], task['category_id'])
+            task['activity_id'] = activity_maps[pair].get(task['activity_name'])
+
+def process_bulk_task(bot, task):
+    """Start and immediately complete one validated bulk-upload row"""
+    try:
+        # Start the task; the result carries the new task's UUID
+        started = bot.start_task(
+            task_type_id=task['task_type_id'],
+            project_id=task['project_id'],
+            category_id=task['category_id'],
+            activity_id=task['activity_id'],
+            task_description=task['description'],
+            start_datetime=task['start_datetime']
+        )
+        
+        if not started:
+            return {
+                'row': task['row_num'],
+                'success': False,
+                'message': 'Failed to create task'
+            }
+        reopen_task_day(bot, started)
+        
+        # End the task if we found its ID
+        if started.task_id:
+            ended = bot.end_task(started.task_id, task['end_datetime'])
+            if bot.username:
+                task_store.reopen_task(bot.username, started.task_id, task['end_datetime'][:10])
+            if not ended:
+                return {
+                    'row': task['row_num'],
+                    'success': True,
+                    'task_id': started.task_id,
+                    'message': 'Task created but could not auto-complete',
+                    'warning': 'Failed to end task'
+                }
+            return {
+                'row': task['row_num'],
+                'success': True,
+                'task_id': started.task_id,
+                'message': 'Task created and completed'
+            }
+        
+        return {
+            'row': task['row_num'],
+            'success': True,
+            'message': 'Task created but could not auto-complete',
+            'warning': 'Could not find task ID'
+        }
+        
+    except Exception as e:
+        return {
+            'row': task['row_num'],
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }
+
 @app.route('/api/tasks/bulk-upload', methods=['POST'])
 def bulk_upload_tasks():
-    """Upload CSV file with multiple tasks"""
+    """Validate a CSV file of tasks and queue it as a background job"""
     bot = get_bot()
     if not bot:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
@@ -358,9 +1015,10 @@ def bulk_upload_tasks():
         errors = []
         row_num = 1
         
-        # Get reference data for validation
-        task_types = bot.get_task_types()
-        projects = bot.get_projects()
+        # Get reference data for validation (both lists fetched concurrently)
+        task_types, projects = bot.map_concurrent(
+            lambda fetch: fetch(), [bot.get_task_types, bot.get_projects]
+        )
         
         # Create lookup dictionaries
         task_type_map = {tt['name'].lower(): tt['id'] for tt in task_types}
@@ -410,19 +1068,9 @@ def bulk_upload_tasks():
                 errors.append(f"Row {row_num}: Invalid project '{row['project']}'")
                 continue
             
-            # Get category and activity IDs if provided
-            category_id = None
-            activity_id = None
-            
-            if row.get('category') and row['category'].strip():
-                categories = bot.get_categories(project_id)
-                category_map = {c['name'].lower(): c['id'] for c in categories}
-                category_id = category_map.get(row['category'].strip().lower())
-            
-            if row.get('activity') and row['activity'].strip() and category_id:
-                activities = bot.get_activities(project_id, category_id)
-                activity_map = {a['name'].lower(): a['id'] for a in activities}
-                activity_id = activity_map.get(row['activity'].strip().lower())
+            # Category and activity IDs are resolved for the whole file below
+            category_name = (row.get('category') or '').strip().lower()
+            activity_name = (row.get('activity') or '').strip().lower()
             
             # Parse dates and times
             try:
@@ -459,8 +1107,10 @@ def bulk_upload_tasks():
                 'row_num': row_num,
                 'task_type_id': task_type_id,
                 'project_id': project_id,
-                'category_id': category_id,
-                'activity_id': activity_id,
+                'category_name': category_name,
+                'activity_name': activity_name,
+                'category_id': None,
+                'activity_id': None,
                 'description': row['description'].strip(),
                 'start_datetime': start_datetime,
                 'end_datetime': end_datetime
@@ -475,84 +1125,121 @@ def bulk_upload_tasks():
                 'valid_tasks': len(tasks)
             }), 400
         
-        # Process tasks one by one
-        results = []
-        for task in tasks:
-            try:
-                # Start the task
-                success = bot.start_task(
-                    task_type_id=task['task_type_id'],
-                    project_id=task['project_id'],
-                    category_id=task['category_id'],
-                    activity_id=task['activity_id'],
-                    task_description=task['description'],
-                    start_datetime=task['start_datetime']
-                )
-                
-                if success:
-                    # Get the task ID from the most recent task
-                    # We need to fetch the task to get its ID so we can end it
-                    start_date = task['start_datetime'].split()[0]
-                    tasks_result = bot.get_my_tasks(start_date)
-                    
-                    task_id = None
-                    if tasks_result and tasks_result.get('success'):
-                        if tasks_result.get('raw_response') and tasks_result['raw_response'].get('data'):
-                            # Get the most recent task (should be the one we just created)
-                            recent_tasks = tasks_result['raw_response']['data']
-                            if recent_tasks:
-                                task_id = recent_tasks[0][0]  # First column is task ID
-                    
-                    # End the task if we found its ID
-                    if task_id:
-                        bot.end_task(task_id, task['end_datetime'])
-                        results.append({
-                            'row': task['row_num'],
-                            'success': True,
-                            'message': 'Task created and completed'
-                        })
-                    else:
-                        results.append({
-                            'row': task['row_num'],
-                            'success': True,
-                            'message': 'Task created but could not auto-complete',
-                            'warning': 'Could not find task ID'
-                        })
-                else:
-                    results.append({
-                        'row': task['row_num'],
-                        'success': False,
-                        'message': 'Failed to create task'
-                    })
-                    
-            except Exception as e:
-                results.append({
-                    'row': task['row_num'],
-                    'success': False,
-                    'message': f'Error: {str(e)}'
-                })
+        resolve_categories_and_activities(bot, tasks)
+        
+        # Run the rows on the job queue and let the browser poll for progress
+        session_id = session.get('session_id')
+        
+        def handle(task):
+            # Keep the session's bot from being reaped while the job runs
+            bots.touch(session_id)
+            return process_bulk_task(bot, task)
+        
+        def on_progress(job, result):
+            if result is None:
+                # Job finished: keep cookies the upstream rotated meanwhile
+                save_bot(session_id, bot)
+            events.publish(session_id, 'job-progress', {**job.to_dict(), 'result': result})
         
-        # Count successes and failures
-        successes = sum(1 for r in results if r['success'])
-        failures = len(results) - successes
+        job = jobs.submit(
+            tasks,
+            handle,
+            owner=session_id,
+            kind='bulk-upload',
+            on_progress=on_progress
+        )
         
         return jsonify({
             'success': True,
-            'message': f'Processed {len(results)} tasks',
-            'stats': {
-                'total': len(results),
-                'success': successes,
-                'failed': failures
-            },
-            'results': results
-        })
+            'message': f'Queued {len(tasks)} tasks',
+            'job_id': job.id,
+            'stats': job.stats()
+        }), 202
         
+    except UpstreamUnavailable:
+        # Answered by the 503 handler, with Retry-After
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Error processing CSV: {str(e)}'
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress counters of a background job"""
+    job = jobs.get(job_id, owner=session.get('session_id'))
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify({'success': True, **job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def get_job_results(job_id):
+    """Per-row results of a background job (use ?offset= to fetch only new rows)"""
+    job = jobs.get(job_id, owner=session.get('session_id'))
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    offset = max(0, request.args.get('offset', 0, type=int))
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'done': job.done,
+        'offset': offset,
+        'results': job.get_results(offset)
+    })
+
+@app.route('/api/events', methods=['GET'])
+def event_stream():
+    """Server-Sent Events: bulk-upload progress, task changes and session expiry"""
+    bot = get_bot()
+    if not bot:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    
+    session_id = session.get('session_id')
+    subscription = events.subscribe(session_id, limit=SSE_MAX_STREAMS)
+    if subscription is None:
+        # Every stream holds a worker thread; past the cap the page polls instead
+        logger.warning("Event stream refused: %d streams already open", SSE_MAX_STREAMS)
+        response = jsonify({'success': False, 'message': 'Too many open event streams'})
+        response.headers['Retry-After'] = str(SSE_RETRY_AFTER)
+        return response, 503
+    
+    def generate():
+        last_check = time.monotonic()
+        try:
+            yield 'retry: 5000\n\n'
+            for message in stream_events(subscription, heartbeat=SSE_HEARTBEAT):
+                if message is not None:
+                    yield message
+                    continue
+                
+                # Idle: keep the connection open and periodically re-check the DTM session
+                yield ': keep-alive\n\n'
+                if time.monotonic() - last_check < SSE_SESSION_CHECK_INTERVAL:
+                    continue
+                last_check = time.monotonic()
+                current = load_bot(session_id)
+                try:
+                    expired = current is None or current.check_session() == SESSION_EXPIRED
+                except UpstreamUnavailable:
+                    # DTM is down, not the session; check again next interval
+                    continue
+                if expired:
+                    bots.remove(session_id)
+                    session_store.delete(session_id)
+                    yield format_sse('session-expired', {})
+                    return
+        finally:
+            events.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 if __name__ == '__main__':
     print("""
 ╔══════════════════════════════════════════╗
@@ -561,5 +1248,7 @@ if __name__ == '__main__':
 ║    http://localhost:5000                 ║
 ╚══════════════════════════════════════════╝
     """)
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    debug = os.environ.get('DTM_DEBUG', '').lower() in ('1', 'true', 'yes')
+    app.run(debug=debug, host='0.0.0.0', port=5000, threaded=True)
 
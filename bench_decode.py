@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for decoding large myTaskList JSONP responses
+
+Compares the old text-slicing path (response.text, strip the wrapper, then
+json.loads) with dtm_decode on each available backend.
+
+Usage:
+    python bench_decode.py [rows] [repeat]
+"""
+
+import json
+import sys
+import timeit
+
+import dtm_decode
+
+
+def build_task_listing(rows: int) -> bytes:
+    """A myTaskList JSONP body shaped like the real one, with HTML cells"""
+    data = []
+    for i in range(rows):
+        uuid = f"{i:08x}-7fdc-415b-ad43-fb4cc0c5b925"
+        data.append([
+            str(i + 1),
+            "<span class='badge badge-info'>PropTech</span> / Mobile App",
+            "Development",
+            "Development",
+            f"Implement feature #{i} – café menu sync",
+            "<span class='text-success'>25-11-13 09:00:00</span>",
+            "<span class='text-danger'>25-11-13 10:30:00</span>",
+            "01:30:00",
+            "<span class='badge badge-success'>Completed</span>",
+            f"<a href='task/updatetask/1/{uuid}' class='btn btn-sm'>Pause</a> "
+            f"<a href='task/updatetask/4/{uuid}' class='btn btn-sm'>End</a>"
+        ])
+    payload = {
+        'draw': 1,
+        'recordsTotal': rows,
+        'recordsFiltered': rows,
+        'data': data,
+        'totalHr': f"{rows * 1.5:.0f}:00",
+        'taskStatus': "<span class='badge'>No active task</span>"
+    }
+    return b'jsonCallback(' + json.dumps(payload, ensure_ascii=False).encode('utf-8') + b')'
+
+
+def decode_old(body: bytes):
+    """The decoding path DTMBot used before dtm_decode"""
+    text = body.decode('utf-8')
+    if text.startswith('jsonCallback(') and text.endswith(')'):
+        return json.loads(text[13:-1])
+    return json.loads(text)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    body = build_task_listing(rows)
+    print(f"Payload: {rows} rows, {len(body) / 1024:.0f} KiB, {repeat} runs each")
+
+    candidates = [('text slice + json.loads', decode_old)]
+    for backend in ('json', 'orjson'):
+        if backend == 'orjson' and not dtm_decode.ORJSON_AVAILABLE:
+            print("  (orjson not installed - skipping)")
+            continue
+        _, decode = dtm_decode._select_backend(backend)
+
+        def run(body=body, decode=decode):
+            start, end = dtm_decode._json_span(body, dtm_decode.JSONP_CALLBACK)
+            return decode(body, start, end)
+        candidates.append((f"dtm_decode ({backend})", run))
+
+    expected = decode_old(body)
+    baseline = None
+    for label, func in candidates:
+        assert func(body) == expected, f"{label} decoded a different payload"
+        best = min(timeit.repeat(lambda: func(body), number=1, repeat=repeat))
+        baseline = baseline or best
+        print(f"  {label:<26} {best * 1000:8.2f} ms  ({baseline / best:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+DTM Async - asyncio client for the Daily Task Monitor system
+
+AsyncDTMBot exposes the same methods as DTMBot as coroutines. Upstream calls
+run on a small dedicated thread pool over DTMBot's keep-alive connection pool,
+and a semaphore bounds how many are in flight at once, so callers can
+asyncio.gather() many requests without opening a socket per call.
+"""
+
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from dtm_bot import DTMBot, DEFAULT_TASK_PAGE_SIZE
+from dtm_models import StartTaskResult
+from dtm_transport import TransportConfig
+
+# Default number of upstream calls allowed in flight per client
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class AsyncDTMBot:
+    """Asyncio wrapper around DTMBot with bounded upstream concurrency"""
+
+    def __init__(
+        self,
+        base_url: str = "https://dtm.payable.lk",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        bot: Optional[DTMBot] = None
+    ):
+        """
+        Args:
+            base_url: DTM server URL (ignored when bot is given)
+            max_concurrency: Maximum upstream calls in flight at once
+            bot: Existing DTMBot to share session and cookies with (left open on close)
+        """
+        self._owns_bot = bot is None
+        if bot is None:
+            # Keep at least one pooled socket per concurrent call
+            bot = DTMBot(
+                base_url=base_url,
+                transport_config=TransportConfig(pool_maxsize=max_concurrency)
+            )
+        self.bot = bot
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix='dtm-async'
+        )
+        # asyncio primitives are bound to one loop; keep one semaphore per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limiter for the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def _call(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking DTMBot method on the pool once a slot is free"""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore():
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+
+    async def __aenter__(self) -> 'AsyncDTMBot':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Shut down the worker pool and release connections of an owned bot"""
+        self._executor.shutdown(wait=False)
+        if self._owns_bot:
+            self.bot.close()
+
+    @property
+    def csrf_token(self) -> Optional[str]:
+        return self.bot.csrf_token
+
+    async def is_session_valid(self, force: bool = False) -> bool:
+        """Check if the current DTM session is still valid"""
+        return await self._call(self.bot.is_session_valid, force)
+
+    async def check_session(self, force: bool = False) -> str:
+        """Probe the DTM session: valid, expired or unknown (DTM did not answer clearly)"""
+        return await self._call(self.bot.check_session, force)
+
+    async def login(self, username: str, password: str) -> bool:
+        """Login to the DTM system"""
+        return await self._call(self.bot.login, username, password)
+
+    async def get_task_types(self) -> List[Dict]:
+        """Fetch available task types"""
+        return await self._call(self.bot.get_task_types)
+
+    async def get_projects(self) -> List[Dict]:
+        """Fetch available projects"""
+        return await self._call(self.bot.get_projects)
+
+    async def get_categories(self, project_id: str) -> List[Dict]:
+        """Fetch categories for a specific project"""
+        return await self._call(self.bot.get_categories, project_id)
+
+    async def get_activities(self, project_id: str, category_id: str) -> List[Dict]:
+        """Fetch activities for a specific project and category"""
+        return await self._call(self.bot.get_activities, project_id, category_id)
+
+    async def start_task(
+        self,
+        task_type_id: str,
+        project_id: str,
+        task_description: str,
+        category_id: Optional[str] = None,
+        activity_id: Optional[str] = None,
+        bug_id: Optional[str] = None,
+        start_datetime: Optional[str] = None
+    ) -> StartTaskResult:
+        """Start a new task (see DTMBot.start_task)"""
+        return await self._call(
+            self.bot.start_task,
+            task_type_id=task_type_id,
+            project_id=project_id,
+            task_description=task_description,
+            category_id=category_id,
+            activity_id=activity_id,
+            bug_id=bug_id,
+            start_datetime=start_datetime
+        )
+
+    async def get_my_tasks(
+        self,
+        search_date: Optional[str] = None,
+        include_raw: bool = False,
+        start: int = 0,
+        length: int = DEFAULT_TASK_PAGE_SIZE
+    ) -> Dict:
+        """Get one page of my tasks (see DTMBot.get_my_tasks)"""
+        return await self._call(self.bot.get_my_tasks, search_date, include_raw, start, length)
+
+    async def end_task(self, task_id: str, end_datetime: Optional[str] = None) -> bool:
+        """End a running task"""
+        return await self._call(self.bot.end_task, task_id, end_datetime)
+
+    async def pause_task(self, task_id: str, pause_datetime: Optional[str] = None) -> bool:
+        """Pause a running task"""
+        return await self._call(self.bot.pause_task, task_id, pause_datetime)
+
+    async def resume_task(self, task_id: str, resume_datetime: Optional[str] = None) -> bool:
+        """Resume a paused task"""
+        return await self._call(self.bot.resume_task, task_id, resume_datetime)
+
+
+async def _demo():
+    """Fetch reference data concurrently after login"""
+    import getpass
+
+    async with AsyncDTMBot() as bot:
+        username = input("Username: ")
+        if not await bot.login(username, getpass.getpass("Password: ")):
+            return
+
+        task_types, projects = await asyncio.gather(
+            bot.get_task_types(),
+            bot.get_projects()
+        )
+        print(f"Found {len(task_types)} task types and {len(projects)} projects")
+
+        categories = await asyncio.gather(
+            *(bot.get_categories(p['id']) for p in projects)
+        )
+        for project, cats in zip(projects, categories):
+            print(f"  {project['name']}: {len(cats)} categories")
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -4,48 +4,394 @@ DTM Bot - Daily Task Monitor Bot
 A bot to start and end tasks programmatically
 """
 
+import base64
 import requests
 import json
-from datetime import datetime
-from typing import Optional, Dict, List
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, Iterator, Optional, Dict, List
+import logging
 import sys
+import threading
+
+from dtm_cache import TTLCache, reference_cache as shared_reference_cache
+from dtm_decode import decode_payload
+from dtm_models import StartTaskResult, TaskRow, strip_html
+from dtm_metrics import observe_upstream
+from dtm_logging import bind_context
+from dtm_transport import HTTPTransport, TransportConfig, UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# How long (seconds) a successful session probe is trusted before /home is hit again
+DEFAULT_SESSION_CHECK_TTL = 60.0
+
+# Seconds a scraped CSRF token is reused before /home is reloaded for a fresh one
+DEFAULT_CSRF_MAX_AGE = 1800.0
+
+# <meta name="csrf-token" content="..."> on every DTM page, matched on raw bytes
+CSRF_TOKEN_RE = re.compile(rb'csrf-token"\s+content="([^"]*)"')
+
+# Bare UUID, used to pick a task ID out of the /user-save response
+UUID_RE = re.compile(r'[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}', re.IGNORECASE)
+
+# Rows requested when looking up a just-started task by description
+TASK_LOOKUP_PAGE_SIZE = 50
+
+# myTaskList rows requested per DataTables page (upstream's own UI asks for 5)
+DEFAULT_TASK_PAGE_SIZE = 100
+
+# task/updatetask/<code>/... status codes, and the format of the time sent along
+TASK_STATUS_CODES = {'pause': 1, 'resume': 2, 'end': 4}
+TASK_STATUS_PAST = {'pause': 'paused', 'resume': 'resumed', 'end': 'ended'}
+TASK_TIME_FORMAT = '%Y-%m-%d %I:%M %p'
+
+# Status changes sent at once by update_tasks
+DEFAULT_BULK_UPDATE_WORKERS = 8
+
+# check_session results; only SESSION_EXPIRED means DTM sent us to the login page
+SESSION_VALID = 'valid'
+SESSION_EXPIRED = 'expired'
+SESSION_UNKNOWN = 'unknown'
+
+
+class CSRFTokenManager:
+    """
+    Keeps the DTM CSRF token and decides when it has to be re-scraped
+
+    The token is reused until it is older than max_age or the upstream rejects
+    it (HTTP 419 / TokenMismatchException); only then is /home reloaded.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_CSRF_MAX_AGE):
+        self.max_age = max_age
+        self.token: Optional[str] = None
+        self.fetched_at = 0.0
+        # Serialises refreshes so concurrent callers reload /home only once
+        self.refresh_lock = threading.Lock()
+
+    def set(self, token: Optional[str]) -> None:
+        """Store a token and restart its max-age clock"""
+        self.token = token
+        self.fetched_at = time.monotonic() if token else 0.0
+
+    def scrape(self, body: bytes) -> Optional[str]:
+        """Update the token from a page body; returns the token if one was found"""
+        match = CSRF_TOKEN_RE.search(body)
+        if not match:
+            return None
+        self.set(match.group(1).decode('utf-8', 'replace'))
+        return self.token
+
+    def is_stale(self) -> bool:
+        """True when there is no token or it has outlived max_age"""
+        return self.token is None or time.monotonic() - self.fetched_at > self.max_age
+
+    def invalidate(self) -> None:
+        """Mark the token as expired so the next ensure fetches a new one"""
+        self.fetched_at = float('-inf')
+
+    @staticmethod
+    def is_rejected(response: requests.Response) -> bool:
+        """True if the upstream refused a request because of the CSRF token"""
+        if response.status_code == 419:
+            return True
+        if response.status_code in (403, 500):
+            return b'TokenMismatch' in response.content or b'CSRF token mismatch' in response.content
+        return False
+
+
+def task_id_from_save_response(response: requests.Response) -> Optional[str]:
+    """
+    Task UUID from a /user-save JSON response, if DTM named it explicitly
+
+    Projects, categories, activities and task types have UUIDs as well, so
+    a bare "id" or a UUID found elsewhere in the body is not trusted; the
+    caller looks the new task up with find_task_id instead.
+    """
+    try:
+        payload = response.json()
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    for source in (payload, payload.get('data')):
+        if not isinstance(source, dict):
+            continue
+        for key in ('task_id', 'taskId'):
+            value = source.get(key)
+            if isinstance(value, str) and UUID_RE.fullmatch(value):
+                return value
+    return None
 
 
 class DTMBot:
     """Bot for interacting with Daily Task Monitor system"""
     
-    def __init__(self, base_url: str = "https://dtm.payable.lk"):
+    def __init__(
+        self,
+        base_url: str = "https://dtm.payable.lk",
+        session_check_ttl: float = DEFAULT_SESSION_CHECK_TTL,
+        transport_config: Optional[TransportConfig] = None,
+        csrf_max_age: float = DEFAULT_CSRF_MAX_AGE,
+        reference_cache: Optional[TTLCache] = None
+    ):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.csrf_token = None
+        self.username = None
+        # Task types/projects/categories/activities, shared across bots by default
+        self.reference_cache = reference_cache if reference_cache is not None else shared_reference_cache
+        self.transport = HTTPTransport(transport_config)
+        self.session = self.transport.session
+        self.csrf = CSRFTokenManager(csrf_max_age)
         self.task_types = []
         self.projects = []
         self.categories = []
         self.activities = []
-        
+        self.session_check_ttl = session_check_ttl
+        self._session_valid_until = 0.0
+
+    @property
+    def csrf_token(self) -> Optional[str]:
+        """Current CSRF token (managed by self.csrf)"""
+        return self.csrf.token
+
+    @csrf_token.setter
+    def csrf_token(self, token: Optional[str]) -> None:
+        self.csrf.set(token)
+
+    def _mark_session_valid(self) -> None:
+        """Trust the current DTM session for another session_check_ttl seconds"""
+        self._session_valid_until = time.monotonic() + self.session_check_ttl
+
+    def invalidate_session_cache(self) -> None:
+        """Forget the cached session validity so the next check probes /home"""
+        self._session_valid_until = 0.0
+
+    @staticmethod
+    def _is_login_response(response: requests.Response) -> bool:
+        """Detect an upstream response that bounced us to the login page"""
+        if response.status_code in (401, 419):
+            return True
+
+        for hop in list(response.history) + [response]:
+            if hop.status_code in (301, 302, 303, 307, 308) and \
+                    'login' in hop.headers.get('Location', '').lower():
+                return True
+
+        if response.url and response.url.lower().rstrip('/').endswith('/login'):
+            return True
+
+        # Only HTML bodies can be a login page; JSON/JSONP list responses are skipped cheaply
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code == 200 and 'text/html' in content_type:
+            return 'sys_login_pwd' in response.text
+
+        return False
+
+    def _track_session(self, response: requests.Response) -> requests.Response:
+        """Invalidate the session cache if an upstream call came back as a login page"""
+        if self._is_login_response(response):
+            logger.info("Upstream redirected to login, session cache invalidated")
+            self.invalidate_session_cache()
+        return response
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        idempotent: bool = False,
+        track: bool = True,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send an upstream request through the pooled transport
+
+        Args:
+            method: HTTP method
+            path: Path relative to base_url (e.g. "/home")
+            idempotent: Allow retries with backoff on transient failures
+            track: Watch the response for a bounce to the login page
+            **kwargs: Passed through to requests
+        """
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = self.transport.request(
+                method, f"{self.base_url}{path}", idempotent=idempotent, **kwargs
+            )
+            status = str(response.status_code)
+        except UpstreamUnavailable:
+            status = 'unavailable'
+            raise
+        finally:
+            observe_upstream(path, method, time.perf_counter() - started, status)
+        return self._track_session(response) if track else response
+
+    def close(self) -> None:
+        """Release pooled upstream connections"""
+        self.transport.close()
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        JSON-serialisable login state: username, cookie jar and CSRF token
+
+        Another process can rebuild an equivalent bot with restore_state().
+        """
+        csrf_age = time.monotonic() - self.csrf.fetched_at if self.csrf.token else None
+        return {
+            'base_url': self.base_url,
+            'username': self.username,
+            'csrf_token': self.csrf.token,
+            # Wall clock, since monotonic clocks are not comparable across processes
+            'csrf_fetched_at': time.time() - csrf_age if csrf_age is not None else None,
+            'cookies': [
+                {
+                    'name': cookie.name,
+                    'value': cookie.value,
+                    'domain': cookie.domain,
+                    'path': cookie.path,
+                    'secure': cookie.secure,
+                    'expires': cookie.expires,
+                    'rest': {'HttpOnly': None} if cookie.has_nonstandard_attr('HttpOnly') else {}
+                }
+                for cookie in self.session.cookies
+            ]
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """
+        Load state saved by export_state()
+
+        The DTM session is not assumed valid; the next is_session_valid() call
+        probes /home as usual.
+        """
+        self.username = state.get('username')
+        self.session.cookies.clear()
+        for cookie in state.get('cookies', []):
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/'),
+                secure=cookie.get('secure', False),
+                expires=cookie.get('expires'),
+                rest=cookie.get('rest', {})
+            )
+
+        self.csrf.set(state.get('csrf_token'))
+        fetched_at = state.get('csrf_fetched_at')
+        if self.csrf.token and fetched_at is not None:
+            self.csrf.fetched_at = time.monotonic() - max(0.0, time.time() - fetched_at)
+        self.invalidate_session_cache()
+
+    def map_concurrent(
+        self,
+        func: Callable,
+        items: Iterable,
+        max_workers: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Call func on each item concurrently and return results in item order
+
+        Concurrency is capped by the transport pool size so every worker gets a
+        kept-alive socket instead of opening a new connection.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        limit = max_workers or self.transport.config.pool_maxsize
+        workers = max(1, min(limit, len(items)))
+        if workers == 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dtm-bot') as executor:
+            # Keep the caller's request ID on log records from the pool threads
+            return list(executor.map(bind_context(func), items))
+
     def _get_csrf_token(self) -> None:
         """Refresh CSRF token from the home page"""
         try:
             # Get home page to refresh CSRF token
-            home_page = self.session.get(f"{self.base_url}/home")
+            home_page = self._request('GET', "/home", idempotent=True)
 
-            if home_page.status_code == 200 and 'csrf-token' in home_page.text:
-                start = home_page.text.find('csrf-token') + len('csrf-token" content="')
-                end = home_page.text.find('"', start)
-                self.csrf_token = home_page.text[start:end]
-                print(f"  ✓ CSRF token refreshed: {self.csrf_token[:20]}...")
+            if home_page.status_code == 200 and self.csrf.scrape(home_page.content):
+                logger.debug("CSRF token refreshed")
             else:
-                print("  ⚠ Could not refresh CSRF token, using existing one")
+                logger.warning("Could not refresh CSRF token, using existing one")
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"  ⚠ Error refreshing CSRF token: {e}")
+            logger.warning("Error refreshing CSRF token: %s", e)
+
+    def _ensure_csrf_token(self) -> None:
+        """Refresh the CSRF token only if it is missing or older than its max age"""
+        if not self.csrf.is_stale():
+            return
+        with self.csrf.refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self.csrf.is_stale():
+                self._get_csrf_token()
+
+    def _post_with_csrf(self, path: str, data: Dict, **kwargs) -> requests.Response:
+        """
+        POST a form that carries _token, refreshing the token once if rejected
+
+        DTM rejects a stale token before doing any work, so resending after a
+        419/TokenMismatch is safe even for non-idempotent forms.
+        """
+        self._ensure_csrf_token()
+        data['_token'] = self.csrf_token
+        response = self._request('POST', path, data=data, **kwargs)
+
+        if CSRFTokenManager.is_rejected(response):
+            logger.info("CSRF token rejected on %s, refreshing and retrying once", path)
+            self.csrf.invalidate()
+            self._ensure_csrf_token()
+            data['_token'] = self.csrf_token
+            response = self._request('POST', path, data=data, **kwargs)
+
+        return response
+
+    def is_session_valid(self, force: bool = False) -> bool:
+        """
+        Check if the current DTM session is still valid
+
+        False both when the session expired and when DTM could not tell (see
+        check_session for callers that must not log out on an outage).
+
+        Args:
+            force: Ignore the cached result and probe /home
+        """
+        return self.check_session(force) == SESSION_VALID
+
+    def check_session(self, force: bool = False) -> str:
+        """
+        Probe the DTM session: SESSION_VALID, SESSION_EXPIRED or SESSION_UNKNOWN
+
+        A positive result is cached for session_check_ttl seconds; the cache is
+        dropped as soon as any upstream call comes back as a login page.
+        SESSION_EXPIRED is only returned when DTM answers with its login form
+        or a redirect to login; network errors, 5xx and pages that show
+        neither are SESSION_UNKNOWN.
+
+        Args:
+            force: Ignore the cached result and probe /home
+
+        Raises:
+            UpstreamUnavailable: The circuit breaker or rate limiter refused the probe
+        """
+        if not force and time.monotonic() < self._session_valid_until:
+            return SESSION_VALID
 
-    def is_session_valid(self) -> bool:
-        """Check if the current DTM session is still valid"""
         try:
             # Try to access the home page
-            response = self.session.get(f"{self.base_url}/home", allow_redirects=True)
+            response = self._request('GET', "/home", idempotent=True, track=False, allow_redirects=True)
 
-            print(f"  Session check: status={response.status_code}, url={response.url}")
+            logger.debug("Session check: status=%s, url=%s", response.status_code, response.url)
 
             # Check for success indicators (same as login method)
             if response.status_code == 200:
@@ -54,56 +400,64 @@ class DTMBot:
                 is_home_url = '/home' in response.url
                 has_login_form = 'login' in response_text and ('form' in response_text or 'password' in response_text)
 
-                print(f"  Session check details: logout={has_logout}, home_url={is_home_url}, login_form={has_login_form}")
+                logger.debug(
+                    "Session check details: logout=%s, home_url=%s, login_form=%s",
+                    has_logout, is_home_url, has_login_form
+                )
 
                 # Valid session indicators: logout link present, or we're on home page
                 if has_logout or is_home_url:
-                    print("  ✓ Session is valid")
-                    return True
+                    logger.debug("Session is valid")
+                    self._mark_session_valid()
+                    # The probe already loaded /home, so keep its token too
+                    self.csrf.scrape(response.content)
+                    return SESSION_VALID
 
                 # If we see login form elements but no logout, session is invalid
                 if has_login_form:
-                    print("  ✗ Session is invalid (login form detected)")
-                    return False
+                    logger.info("Session is invalid (login form detected)")
+                    self.invalidate_session_cache()
+                    return SESSION_EXPIRED
 
             # If we get redirected to login page, session is invalid
             if response.status_code in [301, 302, 303] and 'login' in response.headers.get('Location', '').lower():
-                print("  ✗ Session is invalid (redirect to login)")
-                return False
+                logger.info("Session is invalid (redirect to login)")
+                self.invalidate_session_cache()
+                return SESSION_EXPIRED
 
             # If final URL contains login, session is invalid
             if 'login' in response.url.lower():
-                print("  ✗ Session is invalid (final URL contains login)")
-                return False
+                logger.info("Session is invalid (final URL contains login)")
+                self.invalidate_session_cache()
+                return SESSION_EXPIRED
 
-            # Default to invalid if we can't determine
-            print("  ✗ Session validation inconclusive, defaulting to invalid")
-            return False
+            # A 5xx or an unrecognised page says nothing about the session
+            logger.warning("Session check inconclusive (status %s)", response.status_code)
+            self.invalidate_session_cache()
+            return SESSION_UNKNOWN
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"  ⚠ Error checking session validity: {e}")
-            return False
+            logger.warning("Error checking session validity: %s", e)
+            self.invalidate_session_cache()
+            return SESSION_UNKNOWN
 
     def login(self, username: str, password: str) -> bool:
         """Login to the DTM system"""
         try:
-            print(f"Attempting to login as {username}...")
+            logger.info("Attempting to login as %s", username)
             
             # Get login page to retrieve CSRF token
-            login_page = self.session.get(f"{self.base_url}/login")
+            login_page = self._request('GET', "/login", idempotent=True, track=False)
             
             if login_page.status_code != 200:
-                print(f"✗ Failed to load login page. Status: {login_page.status_code}")
+                logger.warning("Failed to load login page. Status: %s", login_page.status_code)
                 return False
             
             # Extract CSRF token from the page
-            if 'csrf-token' in login_page.text:
-                start = login_page.text.find('csrf-token') + len('csrf-token" content="')
-                end = login_page.text.find('"', start)
-                self.csrf_token = login_page.text[start:end]
-                print(f"  CSRF token retrieved: {self.csrf_token[:20]}...")
-            else:
-                print("✗ Could not find CSRF token")
+            if not self.csrf.scrape(login_page.content):
+                logger.warning("Could not find CSRF token on the login page")
                 return False
             
             # Perform login with correct field names
@@ -113,9 +467,11 @@ class DTMBot:
                 '_token': self.csrf_token
             }
             
-            print("  Sending login request...")
-            response = self.session.post(
-                f"{self.base_url}/login", 
+            logger.debug("Sending login request")
+            response = self._request(
+                'POST',
+                "/login",
+                track=False,
                 data=login_data,
                 allow_redirects=True
             )
@@ -124,120 +480,118 @@ class DTMBot:
             # Success indicators: redirect to /home or presence of logout link
             if response.status_code == 200:
                 if 'logout' in response.text.lower() or '/home' in response.url:
-                    print("✓ Login successful!")
-                    print(f"  Session established")
+                    logger.info("Login successful as %s", username)
+                    self.username = username
                     # Update CSRF token from the new page if available
-                    if 'csrf-token' in response.text:
-                        start = response.text.find('csrf-token') + len('csrf-token" content="')
-                        end = response.text.find('"', start)
-                        self.csrf_token = response.text[start:end]
+                    self.csrf.scrape(response.content)
+                    self._mark_session_valid()
                     return True
                 else:
-                    print("✗ Login failed - Invalid credentials or access denied")
+                    logger.warning("Login failed for %s - invalid credentials or access denied", username)
                     return False
             else:
-                print(f"✗ Login failed - Status code: {response.status_code}")
+                logger.warning("Login failed for %s - status code %s", username, response.status_code)
                 return False
                 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"✗ Login error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Login error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return False
     
+    def _fetch_reference(self, path: str, params: Dict) -> List[Dict]:
+        """
+        GET a reference-data list endpoint and decode its JSON/JSONP body
+
+        Raises on HTTP errors and undecodable bodies so failures are never cached.
+        """
+        response = self._request(
+            'GET',
+            path,
+            idempotent=True,
+            params={**params, '_token': self.csrf_token}
+        )
+        response.raise_for_status()
+
+        # Some list endpoints answer in JSONP format: jsonCallback([...])
+        return decode_payload(response.content)
+
+    def _cached_reference(self, path: str, params: Dict) -> List[Dict]:
+        """
+        Serve a reference-data list from the shared cache, fetching on a miss
+
+        Entries, and the coalescing of concurrent loads, are per account: DTM
+        answers with the logged-in user's lists, which are not guaranteed to be
+        the same for everyone, so bots of different users never share a load.
+        Concurrent requests of one account (tabs, batch calls, bulk-upload
+        resolution) still share a single upstream call.
+        """
+        key = (self.base_url, self.username, path, tuple(sorted(params.items())))
+        data = self.reference_cache.get_or_load(
+            key, lambda: self._fetch_reference(path, params)
+        )
+        # Callers may mutate what they get back; the cached list must stay intact
+        return list(data)
+
+    def invalidate_reference_data(self) -> int:
+        """
+        Drop this account's cached task types, projects, categories and activities
+
+        Returns:
+            Number of cache entries removed
+        """
+        return self.reference_cache.invalidate(
+            lambda key: key[0] == self.base_url and key[1] == self.username
+        )
+
     def get_task_types(self) -> List[Dict]:
         """Fetch available task types"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/taskTypeList",
-                params={'status': 1, '_token': self.csrf_token}
-            )
-            
-            if response.status_code == 200:
-                self.task_types = response.json()
-                return self.task_types
-            return []
+            self.task_types = self._cached_reference("/taskTypeList", {'status': 1})
+            return self.task_types
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"Error fetching task types: {e}")
+            logger.warning("Error fetching task types: %s", e)
             return []
     
     def get_projects(self) -> List[Dict]:
         """Fetch available projects"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/productList",
-                params={'status': 1, '_token': self.csrf_token}
-            )
-            
-            if response.status_code == 200:
-                self.projects = response.json()
-                return self.projects
-            return []
+            self.projects = self._cached_reference("/productList", {'status': 1})
+            return self.projects
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"Error fetching projects: {e}")
+            logger.warning("Error fetching projects: %s", e)
             return []
     
     def get_categories(self, project_id: str) -> List[Dict]:
         """Fetch categories for a specific project"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/categoryList",
-                params={
-                    'status': 1,
-                    'project': project_id,
-                    '_token': self.csrf_token
-                }
+            self.categories = self._cached_reference(
+                "/categoryList",
+                {'status': 1, 'project': project_id}
             )
-            
-            if response.status_code == 200:
-                try:
-                    # Try parsing as JSONP first
-                    response_text = response.text
-                    if response_text.startswith('jsonCallback(') and response_text.endswith(')'):
-                        json_str = response_text[13:-1]
-                        self.categories = json.loads(json_str)
-                    else:
-                        self.categories = response.json()
-                    return self.categories
-                except:
-                    # Try as regular JSON
-                    self.categories = response.json()
-                    return self.categories
-            return []
+            return self.categories
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"Error fetching categories: {e}")
+            logger.warning("Error fetching categories for project %s: %s", project_id, e)
             return []
     
     def get_activities(self, project_id: str, category_id: str) -> List[Dict]:
         """Fetch activities for a specific project and category"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/activityList",
-                params={
-                    'status': 1,
-                    'project': project_id,
-                    'categoryId': category_id,
-                    '_token': self.csrf_token
-                }
+            self.activities = self._cached_reference(
+                "/activityList",
+                {'status': 1, 'project': project_id, 'categoryId': category_id}
             )
-            
-            if response.status_code == 200:
-                try:
-                    # Try parsing as JSONP first
-                    response_text = response.text
-                    if response_text.startswith('jsonCallback(') and response_text.endswith(')'):
-                        json_str = response_text[13:-1]
-                        self.activities = json.loads(json_str)
-                    else:
-                        self.activities = response.json()
-                    return self.activities
-                except:
-                    # Try as regular JSON
-                    self.activities = response.json()
-                    return self.activities
-            return []
+            return self.activities
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"Error fetching activities: {e}")
+            logger.warning("Error fetching activities for project %s, category %s: %s", project_id, category_id, e)
             return []
     
     def start_task(
@@ -249,10 +603,15 @@ class DTMBot:
         activity_id: Optional[str] = None,
         bug_id: Optional[str] = None,
         start_datetime: Optional[str] = None
-    ) -> bool:
+    ) -> StartTaskResult:
         """
         Start a new task
         
+        The returned StartTaskResult is truthy on success and carries the new
+        task's UUID (needed by end/pause/resume). The UUID is read from the
+        save response when DTM includes it, otherwise from one targeted
+        myTaskList lookup matched on description and start time.
+        
         Args:
             task_type_id: ID of the task type
             project_id: ID of the project
@@ -265,14 +624,12 @@ class DTMBot:
         try:
             # Get current datetime if not provided
             if not start_datetime:
-                now = datetime.now()
-                date_str = now.strftime('%Y-%m-%d')
-                time_str = now.strftime('%I:%M:%S %p')
+                dt = datetime.now()
             else:
                 # Parse the provided datetime
                 dt = datetime.fromisoformat(start_datetime)
-                date_str = dt.strftime('%Y-%m-%d')
-                time_str = dt.strftime('%I:%M:%S %p')
+            date_str = dt.strftime('%Y-%m-%d')
+            time_str = dt.strftime('%I:%M:%S %p')
             
             # Get task type text
             task_type_text = "Development"  # Default
@@ -281,9 +638,8 @@ class DTMBot:
                     task_type_text = tt['name']
                     break
             
-            # Prepare form data
+            # Prepare form data (_token is filled in by _post_with_csrf)
             form_data = {
-                '_token': self.csrf_token,
                 'taskType': task_type_id,
                 'taskTypeText': task_type_text,
                 'project': project_id,
@@ -301,143 +657,149 @@ class DTMBot:
                 form_data['bugId'] = bug_id
             
             # Submit the task
-            response = self.session.post(
-                f"{self.base_url}/user-save",
-                data=form_data
-            )
+            response = self._post_with_csrf("/user-save", form_data)
             
             if response.status_code == 200:
-                print("✓ Task started successfully!")
-                print(f"  Task: {task_description}")
-                print(f"  Started at: {date_str} {time_str}")
-                return True
+                logger.info("Task started at %s %s: %s", date_str, time_str, task_description)
+                task_id = task_id_from_save_response(response)
+                if not task_id:
+                    task_id = self.find_task_id(task_description, dt)
+                return StartTaskResult(True, task_id, f"{date_str} {time_str}")
             else:
-                print(f"✗ Failed to start task. Status code: {response.status_code}")
-                return False
+                logger.warning("Failed to start task. Status code: %s", response.status_code)
+                return StartTaskResult(False, message=f"HTTP {response.status_code}")
                 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"✗ Error starting task: {e}")
-            return False
+            logger.error("Error starting task: %s", e)
+            return StartTaskResult(False, message=str(e))
     
-    def get_my_tasks(self, search_date: Optional[str] = None) -> Dict:
+    def _fetch_task_list(
+        self,
+        search_date: str,
+        start: int = 0,
+        length: int = 5,
+        search_value: str = ''
+    ) -> Dict:
+        """
+        POST one DataTables page of myTaskList and return the decoded payload
+
+        Raises:
+            requests.HTTPError: Upstream answered with a non-200 status
+            ValueError: The JSON/JSONP body could not be decoded
         """
-        Get list of my tasks
+        # Prepare form data for DataTables request (full format)
+        form_data = {
+            'callback': 'jsonCallback',
+            'draw': '1',
+            'start': str(start),
+            'length': str(length),
+            'search_time': search_date,
+            'search[value]': search_value,
+            'search[regex]': 'false'
+        }
+
+        # Add columns parameters (DataTables format) - match browser exactly
+        for i in range(10):
+            form_data[f'columns[{i}][data]'] = str(i)
+            form_data[f'columns[{i}][name]'] = ''
+            form_data[f'columns[{i}][searchable]'] = 'true'
+            form_data[f'columns[{i}][orderable]'] = 'false'
+            form_data[f'columns[{i}][search][value]'] = ''
+            form_data[f'columns[{i}][search][regex]'] = 'false'
+
+        # Add required headers to match browser request exactly
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+            'Accept': 'text/javascript, application/javascript, application/ecmascript, application/x-ecmascript, */*; q=0.01',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Referer': f"{self.base_url}/home",
+            'Accept-Encoding': 'gzip, deflate, br, zstd',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Connection': 'keep-alive'
+        }
+
+        # Read-only listing: safe to retry even though it is a POST
+        response = self._post_with_csrf(
+            "/myTaskList",
+            form_data,  # POST body (also includes callback)
+            idempotent=True,
+            params={'callback': 'jsonCallback'},  # Query parameter
+            headers=headers
+        )
+        response.raise_for_status()
+
+        # Response is JSONP format: jsonCallback({...})
+        return decode_payload(response.content)
+
+    def get_my_tasks(
+        self,
+        search_date: Optional[str] = None,
+        include_raw: bool = False,
+        start: int = 0,
+        length: int = DEFAULT_TASK_PAGE_SIZE
+    ) -> Dict:
+        """
+        Get one page of my tasks
         
+        The cached CSRF token is reused; it is only re-scraped from /home when
+        it expires or the upstream rejects it.
+
         Args:
             search_date: Date to search for (YYYY-MM-DD format)
+            include_raw: Keep the HTML cells on each TaskRow and add the
+                undecoded DataTables payload as raw_response
+            start: Offset of the first row (DataTables paging)
+            length: Maximum rows to return
         
         Returns:
-            Dictionary with tasks list, total hours, and task status
+            Dictionary with TaskRow list, total hours, and task status
         """
         try:
             if not search_date:
                 search_date = datetime.now().strftime('%Y-%m-%d')
 
-            print(f"Fetching tasks for date: {search_date}")
-
-            # Ensure we're on the home page first (establish proper session state)
-            self.session.get(f"{self.base_url}/home")
+            logger.debug("Fetching tasks for date: %s (start=%s, length=%s)", search_date, start, length)
 
-            # Refresh CSRF token before making the request (DTM might require fresh token)
-            self._get_csrf_token()
+            data = self._fetch_task_list(search_date, start=start, length=length)
 
-            # Prepare form data for DataTables request (full format)
-            form_data = {
-                'callback': 'jsonCallback',
-                'draw': '1',
-                'start': '0',
-                'length': '5',  # Match browser request (length=5)
-                'search_time': search_date,
-                '_token': self.csrf_token,
-                'search[value]': '',
-                'search[regex]': 'false'
+            # Parse every row's HTML cells once into a TaskRow
+            result = {
+                'success': True,
+                'tasks': TaskRow.from_rows(data.get('data'), keep_raw=include_raw),
+                'total_hours': data.get('totalHr', '0:00'),
+                'task_status': strip_html(data.get('taskStatus', '')),
+                'total_records': data.get('recordsTotal', 0),
+                'start': start,
+                'length': length
             }
+            if include_raw:
+                result['raw_response'] = data  # Undecoded payload for debugging
+            return result
 
-            # Add columns parameters (DataTables format) - match browser exactly
-            for i in range(10):
-                form_data[f'columns[{i}][data]'] = str(i)
-                form_data[f'columns[{i}][name]'] = ''
-                form_data[f'columns[{i}][searchable]'] = 'true'
-                form_data[f'columns[{i}][orderable]'] = 'false'
-                form_data[f'columns[{i}][search][value]'] = ''
-                form_data[f'columns[{i}][search][regex]'] = 'false'
-
-            # Add required headers to match browser request exactly
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                'Accept': 'text/javascript, application/javascript, application/ecmascript, application/x-ecmascript, */*; q=0.01',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Referer': f"{self.base_url}/home",
-                'Accept-Encoding': 'gzip, deflate, br, zstd',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Connection': 'keep-alive'
+        except requests.HTTPError as e:
+            logger.warning("Failed to fetch tasks for %s. Status: %s", search_date, e.response.status_code)
+            return {
+                'success': False,
+                'tasks': [],
+                'total_hours': '0:00',
+                'task_status': '',
+                'error': f'HTTP {e.response.status_code}'
             }
-
-            response = self.session.post(
-                f"{self.base_url}/myTaskList",
-                params={'callback': 'jsonCallback'},  # Query parameter
-                data=form_data,  # POST body (also includes callback)
-                headers=headers
-            )
-
-            if response.status_code == 200:
-                try:
-                    # Response is JSONP format: jsonCallback({...})
-                    # We need to strip the callback wrapper
-                    response_text = response.text
-
-                    # Extract JSON from JSONP
-                    if response_text.startswith('jsonCallback(') and response_text.endswith(')'):
-                        json_str = response_text[13:-1]  # Remove 'jsonCallback(' and ')'
-                        data = json.loads(json_str)
-                    else:
-                        # Try parsing as regular JSON
-                        data = response.json()
-                    
-                    # Extract task information
-                    tasks = []
-                    if 'data' in data:
-                        for row in data['data']:
-                            # Parse the HTML/text data from the response
-                            # The response contains HTML, so we need to extract the relevant info
-                            tasks.append({
-                                'raw_data': row  # Store raw data for now
-                            })
-                    
-                    result = {
-                        'success': True,
-                        'tasks': tasks,
-                        'total_hours': data.get('totalHr', '0:00'),
-                        'task_status': data.get('taskStatus', ''),
-                        'total_records': data.get('recordsTotal', 0),
-                        'raw_response': data  # Include raw response for debugging
-                    }
-                    
-                    return result
-                    
-                except json.JSONDecodeError as e:
-                    print(f"  ✗ Failed to parse JSON response: {e}")
-                    return {
-                        'success': False,
-                        'tasks': [],
-                        'total_hours': '0:00',
-                        'task_status': '',
-                        'error': 'Failed to parse response'
-                    }
-            else:
-                print(f"  ✗ Failed to fetch tasks. Status: {response.status_code}")
-                return {
-                    'success': False,
-                    'tasks': [],
-                    'total_hours': '0:00',
-                    'task_status': '',
-                    'error': f'HTTP {response.status_code}'
-                }
-                
+        except ValueError as e:
+            logger.warning("Failed to parse task list for %s: %s", search_date, e)
+            return {
+                'success': False,
+                'tasks': [],
+                'total_hours': '0:00',
+                'task_status': '',
+                'error': 'Failed to parse response'
+            }
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"  ✗ Error fetching tasks: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Error fetching tasks for %s: %s", search_date, e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return {
                 'success': False,
                 'tasks': [],
@@ -445,7 +807,215 @@ class DTMBot:
                 'task_status': '',
                 'error': str(e)
             }
-    
+
+    def iter_tasks(
+        self,
+        date_from: str,
+        date_to: Optional[str] = None,
+        page_size: int = DEFAULT_TASK_PAGE_SIZE,
+        include_raw: bool = False
+    ) -> Iterator[TaskRow]:
+        """
+        Stream my tasks for a date range, one myTaskList page at a time
+
+        Only the current page is held in memory. While its rows are being
+        consumed the next page (or the next day's first page) is already
+        being fetched on a background thread.
+
+        Args:
+            date_from: First day (YYYY-MM-DD format)
+            date_to: Last day, inclusive (defaults to date_from)
+            page_size: Rows requested per page
+            include_raw: Keep the HTML cells on each TaskRow
+
+        Raises:
+            requests.HTTPError: Upstream answered with a non-200 status
+            ValueError: Bad dates, or a page that could not be decoded
+        """
+        first_day = datetime.strptime(date_from, '%Y-%m-%d')
+        last_day = datetime.strptime(date_to or date_from, '%Y-%m-%d')
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        def next_page(day: datetime, start: int, data: Dict) -> Optional[tuple]:
+            rows = data.get('data') or []
+            total = data.get('recordsFiltered', data.get('recordsTotal', 0)) or 0
+            if len(rows) >= page_size and start + page_size < total:
+                return day, start + page_size
+            if day < last_day:
+                return day + timedelta(days=1), 0
+            return None
+
+        def fetch(day: datetime, start: int) -> Dict:
+            return self._fetch_task_list(day.strftime('%Y-%m-%d'), start=start, length=page_size)
+
+        # One worker: at most one page is prefetched ahead of the consumer
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dtm-pages')
+        try:
+            page = (first_day, 0)
+            future = executor.submit(bind_context(fetch), *page)
+            while page is not None:
+                data = future.result()
+                following = next_page(page[0], page[1], data)
+                if following is not None:
+                    future = executor.submit(bind_context(fetch), *following)
+                yield from TaskRow.from_rows(data.get('data'), keep_raw=include_raw)
+                page = following
+        finally:
+            # Also runs when the caller stops iterating early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def find_task_id(self, description: str, started_at: datetime) -> Optional[str]:
+        """
+        Look up the UUID of a task by its description and start time
+
+        Makes a single myTaskList request for the start date, filtered by the
+        description, and only returns a UUID when exactly one row matches both
+        the description and the start minute.
+        """
+        try:
+            data = self._fetch_task_list(
+                started_at.strftime('%Y-%m-%d'),
+                length=TASK_LOOKUP_PAGE_SIZE,
+                search_value=description
+            )
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logger.warning("Could not look up task ID: %s", e)
+            return None
+
+        wanted_start = started_at.replace(second=0, microsecond=0)
+        matches = {
+            task.uuid
+            for task in TaskRow.from_rows(data.get('data'))
+            if task.description == description.strip()
+            and task.start is not None
+            and task.start.replace(second=0) == wanted_start
+        }
+        matches.discard(None)
+        return matches.pop() if len(matches) == 1 else None
+
+    def get_ongoing_tasks(self, days: int = 7, max_workers: Optional[int] = None) -> Dict:
+        """
+        Find on going, paused and on hold tasks over the last few days
+
+        The CSRF token is checked once up front, then every day in the window is
+        listed concurrently. Rows are deduplicated by task UUID since a task
+        that spans several days shows up in each day's listing.
+
+        Args:
+            days: Number of days to look back, including today
+            max_workers: Cap on concurrent upstream listings
+
+        Returns:
+            Dictionary with the open TaskRows, their count and any failed dates
+        """
+        today = datetime.now()
+        dates = [(today - timedelta(days=n)).strftime('%Y-%m-%d') for n in range(days)]
+
+        self._ensure_csrf_token()
+        results = self.map_concurrent(
+            self.get_my_tasks,
+            dates,
+            max_workers
+        )
+
+        ongoing_tasks = []
+        seen = set()
+        failed_dates = []
+        for date, result in zip(dates, results):
+            if not result.get('success'):
+                failed_dates.append(date)
+                continue
+
+            for task in result['tasks']:
+                if not task.is_open:
+                    continue
+                task_key = task.uuid or (date, task.index)
+                if task_key in seen:
+                    continue
+                seen.add(task_key)
+                ongoing_tasks.append(task)
+
+        return {
+            'success': len(failed_dates) < len(dates),
+            'tasks': ongoing_tasks,
+            'count': len(ongoing_tasks),
+            'checked_days': days,
+            'failed_dates': failed_dates
+        }
+
+    def update_task_status(self, task_id: str, status: str, when: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Move a task to another state through task/updatetask/<code>/<id>/<payload>
+
+        Args:
+            task_id: UUID of the task
+            status: pause, resume or end (see TASK_STATUS_CODES)
+            when: Time of the change in format "YYYY-MM-DD HH:MM AM/PM" (defaults to now)
+
+        Returns:
+            {'task_id', 'status', 'success', 'message', 'retryable'}; retryable is
+            True only when DTM could not answer (network error or 5xx), never
+            when it refused the change
+
+        Raises:
+            UpstreamUnavailable: The rate limiter or circuit breaker refused the call
+        """
+        outcome = {'task_id': task_id, 'status': status, 'success': False, 'message': '', 'retryable': False}
+        try:
+            dt = datetime.strptime(when, TASK_TIME_FORMAT) if when else datetime.now()
+        except ValueError:
+            outcome['message'] = f"Invalid {status} time: {when}"
+            return outcome
+        task_time = dt.strftime('%Y-%m-%d')
+        task_time_only = dt.strftime('%I:%M %p')
+
+        # DTM takes the time as base64-encoded JSON in the URL
+        update_req = {
+            "task_time": task_time,
+            "task_time_only": task_time_only
+        }
+        myreq = base64.b64encode(json.dumps(update_req).encode()).decode()
+        path = f"/task/updatetask/{TASK_STATUS_CODES[status]}/{task_id}/{myreq}"
+        logger.debug("Task %s -> %s at %s %s via %s%s", task_id, status, task_time, task_time_only, self.base_url, path)
+
+        try:
+            response = self._request('GET', path)
+        except UpstreamUnavailable:
+            # Subclasses requests.ConnectionError, but DTM was never contacted
+            raise
+        except requests.RequestException as e:
+            logger.error("Error trying to %s task %s: %s", status, task_id, e)
+            outcome.update(message=str(e), retryable=True)
+            return outcome
+
+        logger.debug("Update response: status=%s, url=%s", response.status_code, response.url)
+
+        if response.status_code != 200:
+            logger.warning("Failed to %s task %s. Status code: %s", status, task_id, response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Response text: %s", response.text[:500])
+            outcome.update(message=f"HTTP {response.status_code}", retryable=response.status_code >= 500)
+            return outcome
+
+        try:
+            result = response.json()
+        except ValueError:
+            logger.warning("Unexpected response to %s task %s", status, task_id)
+            outcome['message'] = "Unexpected response from DTM"
+            return outcome
+
+        logger.debug("Update response body: %s", result)
+        if result.get('success'):
+            logger.info("Task %s %s at %s %s", task_id, TASK_STATUS_PAST[status], task_time, task_time_only)
+            outcome['success'] = True
+        else:
+            outcome['message'] = result.get('message') or f"DTM refused to {status} the task"
+            logger.warning("Failed to %s task %s: %s", status, task_id, outcome['message'])
+        return outcome
+
     def end_task(self, task_id: str, end_datetime: Optional[str] = None) -> bool:
         """
         End a running task
@@ -454,49 +1024,7 @@ class DTMBot:
             task_id: ID of the task to end
             end_datetime: Optional end datetime in format "YYYY-MM-DD HH:MM AM/PM" (defaults to now)
         """
-        try:
-            # Get current datetime if not provided
-            if not end_datetime:
-                now = datetime.now()
-                task_time = now.strftime('%Y-%m-%d')
-                task_time_only = now.strftime('%I:%M %p')
-            else:
-                # Parse datetime string in format "YYYY-MM-DD HH:MM AM/PM"
-                dt = datetime.strptime(end_datetime, '%Y-%m-%d %I:%M %p')
-                task_time = dt.strftime('%Y-%m-%d')
-                task_time_only = dt.strftime('%I:%M %p')
-            
-            # Prepare the update request
-            update_req = {
-                "task_time": task_time,
-                "task_time_only": task_time_only
-            }
-            
-            # Encode the request
-            import base64
-            myreq = base64.b64encode(json.dumps(update_req).encode()).decode()
-            
-            # End the task (status 4 = end)
-            response = self.session.get(
-                f"{self.base_url}/task/updatetask/4/{task_id}/{myreq}"
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    print("✓ Task ended successfully!")
-                    print(f"  Ended at: {task_time} {task_time_only}")
-                    return True
-                else:
-                    print(f"✗ Failed to end task: {result.get('message')}")
-                    return False
-            else:
-                print(f"✗ Failed to end task. Status code: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            print(f"✗ Error ending task: {e}")
-            return False
+        return self.update_task_status(task_id, 'end', end_datetime)['success']
     
     def pause_task(self, task_id: str, pause_datetime: Optional[str] = None) -> bool:
         """
@@ -506,49 +1034,7 @@ class DTMBot:
             task_id: ID of the task to pause
             pause_datetime: Optional pause datetime in format "YYYY-MM-DD HH:MM AM/PM" (defaults to now)
         """
-        try:
-            # Get current datetime if not provided
-            if not pause_datetime:
-                now = datetime.now()
-                task_time = now.strftime('%Y-%m-%d')
-                task_time_only = now.strftime('%I:%M %p')
-            else:
-                # Parse datetime string in format "YYYY-MM-DD HH:MM AM/PM"
-                dt = datetime.strptime(pause_datetime, '%Y-%m-%d %I:%M %p')
-                task_time = dt.strftime('%Y-%m-%d')
-                task_time_only = dt.strftime('%I:%M %p')
-            
-            # Prepare the update request
-            update_req = {
-                "task_time": task_time,
-                "task_time_only": task_time_only
-            }
-            
-            # Encode the request
-            import base64
-            myreq = base64.b64encode(json.dumps(update_req).encode()).decode()
-            
-            # Pause the task (status 1 = pause)
-            response = self.session.get(
-                f"{self.base_url}/task/updatetask/1/{task_id}/{myreq}"
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    print("✓ Task paused successfully!")
-                    print(f"  Paused at: {task_time} {task_time_only}")
-                    return True
-                else:
-                    print(f"✗ Failed to pause task: {result.get('message')}")
-                    return False
-            else:
-                print(f"✗ Failed to pause task. Status code: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            print(f"✗ Error pausing task: {e}")
-            return False
+        return self.update_task_status(task_id, 'pause', pause_datetime)['success']
     
     def resume_task(self, task_id: str, resume_datetime: Optional[str] = None) -> bool:
         """
@@ -558,62 +1044,50 @@ class DTMBot:
             task_id: ID of the task to resume
             resume_datetime: Optional resume datetime in format "YYYY-MM-DD HH:MM AM/PM" (defaults to now)
         """
-        try:
-            # Get current datetime if not provided
-            if not resume_datetime:
-                now = datetime.now()
-                task_time = now.strftime('%Y-%m-%d')
-                task_time_only = now.strftime('%I:%M %p')
-            else:
-                # Parse datetime string in format "YYYY-MM-DD HH:MM AM/PM"
-                dt = datetime.strptime(resume_datetime, '%Y-%m-%d %I:%M %p')
-                task_time = dt.strftime('%Y-%m-%d')
-                task_time_only = dt.strftime('%I:%M %p')
-            
-            # Prepare the update request
-            update_req = {
-                "task_time": task_time,
-                "task_time_only": task_time_only
-            }
-            
-            # Encode the request
-            import base64
-            myreq = base64.b64encode(json.dumps(update_req).encode()).decode()
-            
-            # Resume the task (status 2 = continue/resume)
-            url = f"{self.base_url}/task/updatetask/2/{task_id}/{myreq}"
-            print(f"  Resuming task with URL: {url}")
-            print(f"  Task ID: {task_id}")
-            print(f"  Resume time: {task_time} {task_time_only}")
-            
-            response = self.session.get(url)
-            
-            print(f"  Response status: {response.status_code}")
-            print(f"  Response URL: {response.url}")
-            
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    print(f"  Response body: {result}")
-                    if result.get('success'):
-                        print("✓ Task resumed successfully!")
-                        print(f"  Resumed at: {task_time} {task_time_only}")
-                        return True
-                    else:
-                        print(f"✗ Failed to resume task: {result.get('message')}")
-                        return False
-                except Exception as e:
-                    print(f"✗ Failed to parse response: {e}")
-                    print(f"  Response text: {response.text[:500]}")
-                    return False
-            else:
-                print(f"✗ Failed to resume task. Status code: {response.status_code}")
-                print(f"  Response text: {response.text[:500]}")
-                return False
-                
-        except Exception as e:
-            print(f"✗ Error resuming task: {e}")
-            return False
+        return self.update_task_status(task_id, 'resume', resume_datetime)['success']
+
+    def update_tasks(
+        self,
+        task_ids: Iterable[str],
+        status: str,
+        when: Optional[str] = None,
+        max_workers: int = DEFAULT_BULK_UPDATE_WORKERS
+    ) -> List[Dict[str, Any]]:
+        """
+        Pause, resume or end several tasks concurrently
+
+        Every task gets the same time, taken once up front when when is not
+        given. A task refused by the circuit breaker or rate limiter is
+        reported as retryable, like a network error or 5xx, instead of
+        failing the others.
+
+        Args:
+            task_ids: UUIDs of the tasks (duplicates are sent once)
+            status: pause, resume or end
+            when: Time of the change in format "YYYY-MM-DD HH:MM AM/PM" (defaults to now)
+            max_workers: Most updates in flight at once
+
+        Returns:
+            One update_task_status result per task, in task_ids order
+        """
+        if status not in TASK_STATUS_CODES:
+            raise ValueError(f"Unknown task status change: {status}")
+        when = when or datetime.now().strftime(TASK_TIME_FORMAT)
+
+        def update(task_id: str) -> Dict[str, Any]:
+            try:
+                return self.update_task_status(task_id, status, when)
+            except UpstreamUnavailable as e:
+                return {
+                    'task_id': task_id,
+                    'status': status,
+                    'success': False,
+                    'message': str(e),
+                    'retryable': True
+                }
+
+        workers = min(max_workers, self.transport.config.pool_maxsize)
+        return self.map_concurrent(update, dict.fromkeys(task_ids), max_workers=workers)
 
 
 def print_banner():
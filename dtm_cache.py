@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+DTM Cache - in-memory TTL + LRU cache for DTM reference data, with request coalescing
+
+Task types, projects, categories and activities change rarely but are
+requested every time the start-task form opens. One cache instance can be
+shared by every DTMBot of the same process; keys carry the base URL and
+username so accounts never see each other's lists.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Defaults for the process-wide reference data cache
+DEFAULT_REFERENCE_TTL = 300.0
+DEFAULT_REFERENCE_MAXSIZE = 512
+
+_MISSING = object()
+
+
+class _Call:
+    """One in-flight SingleFlight call and its outcome"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into a single call
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or exception). Nothing is
+    remembered afterwards, so results are never stale.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run func() for key, or wait for the identical call already running"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'in_flight': len(self._calls), 'calls': self.calls, 'shared': self.shared}
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire ttl seconds after being stored"""
+
+    def __init__(self, maxsize: int = DEFAULT_REFERENCE_MAXSIZE, ttl: float = DEFAULT_REFERENCE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Concurrent misses on the same key share one load
+        self._flight = SingleFlight()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value, or default on a miss"""
+        return self._lookup(key, default, count_miss=True)
+
+    def _lookup(self, key: Hashable, default: Any, count_miss: bool) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            if count_miss:
+                self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader() on a miss
+
+        Concurrent misses on the same key wait for a single loader() call.
+        Exceptions from loader propagate (to every waiter) and nothing is
+        cached, so failed upstream calls are retried on the next request.
+
+        Only the caller whose loader() runs counts as a miss; callers that
+        waited for it count as hits (and as coalesced in stats()).
+        """
+        value = self._lookup(key, _MISSING, count_miss=False)
+        if value is not _MISSING:
+            return value
+
+        loaded = []
+
+        def load():
+            # A flight that ended just before this one started may have stored it already
+            value = self._lookup(key, _MISSING, count_miss=False)
+            if value is not _MISSING:
+                return value
+            loaded.append(True)
+            with self._lock:
+                self.misses += 1
+            value = loader()
+            # Stored before the flight ends, so later callers hit the cache
+            self.set(key, value)
+            return value
+
+        value = self._flight.do(key, load)
+        if not loaded:
+            # Served by another caller's load
+            with self._lock:
+                self.hits += 1
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop entries whose key matches predicate (all entries if None)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._data)
+                self._data.clear()
+                return removed
+            doomed = [key for key in self._data if predicate(key)]
+            for key in doomed:
+                del self._data[key]
+            return len(doomed)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+            self._flight.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring (misses are loads that went upstream)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'coalesced': self._flight.shared,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0
+            }
+
+
+# Shared by every DTMBot that isn't given its own cache
+reference_cache = TTLCache()
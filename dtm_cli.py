@@ -5,11 +5,16 @@ Easy-to-use command line interface for task management
 """
 
 import argparse
+import asyncio
 import json
+import logging
 import os
 from datetime import datetime
 from getpass import getpass
 from dtm_bot import DTMBot
+from dtm_logging import configure_console_logging
+from dtm_async import AsyncDTMBot
+from dtm_store import TaskStore, DEFAULT_CLI_TASK_STORE_PATH
 
 
 class DTMCli:
@@ -19,6 +24,7 @@ class DTMCli:
         self.bot = DTMBot()
         self.config_file = os.path.expanduser('~/.dtm_config.json')
         self.config = self.load_config()
+        self.store = TaskStore(os.environ.get('DTM_TASK_STORE', DEFAULT_CLI_TASK_STORE_PATH))
     
     def load_config(self):
         """Load configuration from file"""
@@ -39,6 +45,14 @@ class DTMCli:
         except Exception as e:
             print(f"✗ Error saving configuration: {e}")
     
+    async def _fetch_reference_data(self):
+        """Fetch task types and projects concurrently over the bot's session"""
+        async with AsyncDTMBot(bot=self.bot) as async_bot:
+            return await asyncio.gather(
+                async_bot.get_task_types(),
+                async_bot.get_projects()
+            )
+
     def setup(self):
         """Interactive setup"""
         print("\n=== DTM Bot Setup ===\n")
@@ -54,14 +68,12 @@ class DTMCli:
                 self.config['password'] = password
             
             # Fetch and save common data
-            print("\nFetching task types...")
-            task_types = self.bot.get_task_types()
+            print("\nFetching task types and projects...")
+            task_types, projects = asyncio.run(self._fetch_reference_data())
             if task_types:
                 self.config['task_types'] = task_types
                 print(f"  Found {len(task_types)} task types")
             
-            print("\nFetching projects...")
-            projects = self.bot.get_projects()
             if projects:
                 self.config['projects'] = projects
                 print(f"  Found {len(projects)} projects")
@@ -210,8 +222,10 @@ class DTMCli:
             )
             
             if success:
+                self.store.reopen_day(self.bot.username, success.started_at[:10])
                 # Save last task info
                 self.config['last_task'] = {
+                    'task_id': success.task_id,
                     'task_type': task_type['name'],
                     'project': project['name'],
                     'description': task_desc,
@@ -256,7 +270,9 @@ class DTMCli:
         )
         
         if success:
+            self.store.reopen_day(self.bot.username, success.started_at[:10])
             self.config['last_task'] = {
+                'task_id': success.task_id,
                 'task_type': task_type['name'],
                 'project': project['name'],
                 'description': description,
@@ -270,13 +286,53 @@ class DTMCli:
             return
         
         print(f"\nEnding task {task_id}...")
-        self.bot.end_task(task_id)
+        if self.bot.end_task(task_id):
+            self.store.reopen_task(self.bot.username, task_id, datetime.now().strftime('%Y-%m-%d'))
+    
+    def _print_task(self, task):
+        print(f"  [{task.status_text or task.status.value}] {task.description}")
+        print(f"      {task.task_type} | {task.category} | {task.activity}")
+        start = task.start.strftime('%Y-%m-%d %H:%M') if task.start else '-'
+        print(f"      Started: {start}   ID: {task.uuid or task.index}")
+
+    def list_my_tasks(self, date=None, refresh=False):
+        """List my tasks for a day (closed past days come from the local store unless refresh)"""
+        if not self.login():
+            return
+        
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        result = self.store.get_day(self.bot, date, refresh=refresh)
+        if not result.get('success'):
+            print(f"✗ Could not load tasks: {result.get('error')}")
+            return
+        
+        print(f"\n=== Tasks for {date} ({result.get('total_hours')}) ===")
+        for task in result['tasks']:
+            self._print_task(task)
+        if not result['tasks']:
+            print("  No tasks")
+    
+    def list_ongoing_tasks(self, days=7):
+        """List on going and paused tasks over the last few days"""
+        if not self.login():
+            return
+        
+        result = self.store.get_ongoing(self.bot, days)
+        print(f"\n=== Ongoing Tasks (last {days} days) ===")
+        for task in result['tasks']:
+            self._print_task(task)
+        if not result['tasks']:
+            print("  No ongoing tasks")
+        if result['failed_dates']:
+            print(f"⚠ Could not check: {', '.join(result['failed_dates'])}")
     
     def show_last_task(self):
         """Show last started task"""
         last_task = self.config.get('last_task')
         if last_task:
             print("\n=== Last Task ===")
+            if last_task.get('task_id'):
+                print(f"Task ID: {last_task.get('task_id')}")
             print(f"Task Type: {last_task.get('task_type')}")
             print(f"Project: {last_task.get('project')}")
             print(f"Description: {last_task.get('description')}")
@@ -291,6 +347,8 @@ def main():
         description='DTM Bot - Command Line Interface for Task Management'
     )
     
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Show upstream request diagnostics')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Setup command
@@ -315,7 +373,17 @@ def main():
     # Show last task
     subparsers.add_parser('last', help='Show last started task')
     
+    # Task history (served from the local task store)
+    tasks_parser = subparsers.add_parser('tasks', help='List my tasks for a day')
+    tasks_parser.add_argument('--date', help='Day to list (YYYY-MM-DD, default today)')
+    tasks_parser.add_argument('--refresh', action='store_true',
+                              help='Fetch the day from DTM even if it is stored as closed')
+    ongoing_parser = subparsers.add_parser('ongoing', help='List on going and paused tasks')
+    ongoing_parser.add_argument('--days', type=int, default=7, help='Days to look back (default 7)')
+    
     args = parser.parse_args()
+    # Bot progress messages go to the console as plain lines
+    configure_console_logging(logging.DEBUG if args.verbose else logging.INFO)
     
     cli = DTMCli()
     
@@ -334,6 +402,10 @@ def main():
         cli.end_task(args.task_id)
     elif args.command == 'last':
         cli.show_last_task()
+    elif args.command == 'tasks':
+        cli.list_my_tasks(args.date, args.refresh)
+    elif args.command == 'ongoing':
+        cli.list_ongoing_tasks(args.days)
     else:
         parser.print_help()
 
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+DTM Decode - JSON/JSONP decoding straight from response bytes
+
+DTM list endpoints answer either plain JSON or JSONP (jsonCallback({...})).
+decode_payload() finds the JSON inside the wrapper by offset and parses it
+without slicing the body into a new string. orjson is used when installed;
+set DTM_JSON_BACKEND=json to force the standard library decoder.
+"""
+
+import json
+import os
+from typing import Any, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Callback name DTM uses for every JSONP endpoint
+JSONP_CALLBACK = b'jsonCallback'
+
+_WHITESPACE = b' \t\r\n'
+_stdlib_decoder = json.JSONDecoder()
+
+
+def _json_span(body: bytes, callback: bytes) -> Tuple[int, int]:
+    """
+    Start/end offsets of the JSON document inside body
+
+    For a JSONP body the span excludes "callback(" and the closing ")" (plus
+    an optional trailing ";"); plain JSON bodies span everything.
+    """
+    start, end = 0, len(body)
+    while start < end and body[start] in _WHITESPACE:
+        start += 1
+    while end > start and body[end - 1] in _WHITESPACE:
+        end -= 1
+
+    if body.startswith(callback, start):
+        open_paren = start + len(callback)
+        if open_paren < end and body[open_paren] == ord('('):
+            if end > open_paren and body[end - 1] == ord(';'):
+                end -= 1
+            if end > open_paren and body[end - 1] == ord(')'):
+                return open_paren + 1, end - 1
+    return start, end
+
+
+def _decode_orjson(body: bytes, start: int, end: int) -> Any:
+    # memoryview slices share the buffer, so the body is never copied
+    return orjson.loads(memoryview(body)[start:end])
+
+
+def _decode_stdlib(body: bytes, start: int, end: int) -> Any:
+    # One bytes -> str decode is unavoidable; parse in place from the offset
+    text = body.decode('utf-8')
+    # The JSONP prefix and suffix are ASCII, so byte offsets map to str
+    # offsets from the front and the back alike
+    end = len(text) - (len(body) - end)
+    value, stop = _stdlib_decoder.raw_decode(text, start)
+    while stop < end and text[stop] in ' \t\r\n':
+        stop += 1
+    if stop != end:
+        raise json.JSONDecodeError('Extra data', text, stop)
+    return value
+
+
+def _select_backend(name: str):
+    if name == 'json' or not ORJSON_AVAILABLE:
+        return 'json', _decode_stdlib
+    return 'orjson', _decode_orjson
+
+
+BACKEND, _decode = _select_backend(os.environ.get('DTM_JSON_BACKEND', '').lower())
+
+
+def decode_payload(body: bytes, callback: bytes = JSONP_CALLBACK) -> Any:
+    """
+    Decode a JSON or JSONP response body
+
+    Args:
+        body: Raw response bytes (response.content)
+        callback: JSONP callback name to unwrap
+
+    Raises:
+        ValueError: The body is not valid JSON (orjson and json both raise
+            ValueError subclasses)
+    """
+    start, end = _json_span(body, callback)
+    if start >= end:
+        raise ValueError('Empty JSON response body')
+    return _decode(body, start, end)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+DTM Events - in-process publish/subscribe bus feeding Server-Sent Events
+
+Each browser session subscribes to its own channel (the web session id).
+Publishers never block: a subscriber that stops reading loses its oldest
+undelivered events instead of stalling the request that published them.
+"""
+
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional, Set
+
+# Undelivered events kept per subscriber before old ones are dropped
+DEFAULT_SUBSCRIBER_BUFFER = 100
+
+
+class Subscription:
+    """One listener's event queue on a channel"""
+
+    def __init__(self, channel: str, maxsize: int = DEFAULT_SUBSCRIBER_BUFFER):
+        self.channel = channel
+        self.queue: 'queue.Queue[tuple]' = queue.Queue(maxsize=maxsize)
+
+    def put(self, event: str, data: Dict[str, Any]) -> None:
+        """Queue an event, dropping the oldest one if the buffer is full"""
+        while True:
+            try:
+                self.queue.put_nowait((event, data))
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Optional[tuple]:
+        """Next (event, data) pair, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Thread-safe fan-out of events to every subscriber of a channel"""
+
+    def __init__(self):
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, limit: int = 0) -> Optional[Subscription]:
+        """
+        Add a listener to channel
+
+        Args:
+            limit: Most subscribers across all channels (0 = no limit)
+
+        Returns:
+            The subscription, or None if limit subscribers are already open
+        """
+        subscription = Subscription(channel)
+        with self._lock:
+            if limit and sum(len(subs) for subs in self._channels.values()) >= limit:
+                return None
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+
+    def publish(self, channel: Optional[str], event: str, data: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Send an event to every subscriber of channel
+
+        Returns:
+            Number of subscribers the event was queued for
+        """
+        if not channel:
+            return 0
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event, data or {})
+        return len(subscribers)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._channels.values())
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def stream_events(
+    subscription: Subscription,
+    heartbeat: float = 15.0
+) -> Iterator[Optional[str]]:
+    """
+    Yield SSE messages for a subscription, or None after each idle heartbeat
+
+    Callers emit a keep-alive comment for None (and may run periodic checks)
+    so proxies do not close an idle stream.
+    """
+    while True:
+        item = subscription.get(timeout=heartbeat)
+        if item is None:
+            yield None
+            continue
+        event, data = item
+        yield format_sse(event, data)
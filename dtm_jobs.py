@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+DTM Jobs - in-process background job queue for long-running bot work
+
+Bulk uploads run on a small worker pool instead of inside the HTTP request.
+Each job processes its items in order and records one result dict per item,
+so the web app can poll progress and per-row results while the job runs.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dtm_logging import bind_context
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# Defaults for the web app's job queue
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_RETENTION = 3600.0
+
+
+class Job:
+    """A batch of items processed by one handler, with per-item results"""
+
+    def __init__(self, owner: Optional[str], kind: str, items: List[Any]):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.kind = kind
+        self.items = items
+        self.total = len(items)
+        self.status = JOB_QUEUED
+        self.results: List[Dict] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def add_result(self, result: Dict) -> None:
+        with self._lock:
+            self.results.append(result)
+
+    def get_results(self, offset: int = 0) -> List[Dict]:
+        """Results recorded so far, starting at offset"""
+        with self._lock:
+            return self.results[offset:]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            successes = sum(1 for r in self.results if r.get('success'))
+            return {
+                'total': self.total,
+                'processed': len(self.results),
+                'success': successes,
+                'failed': len(self.results) - successes
+            }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly status summary (results are served separately)"""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'done': self.done,
+            'stats': self.stats(),
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """Runs submitted jobs on a bounded worker pool and keeps them for polling"""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_JOB_WORKERS,
+        retention: float = DEFAULT_JOB_RETENTION
+    ):
+        """
+        Args:
+            max_workers: Jobs processed at the same time
+            retention: Seconds a finished job stays available for polling
+        """
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dtm-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        items: Iterable[Any],
+        handler: Callable[[Any], Dict],
+        owner: Optional[str] = None,
+        kind: str = 'job',
+        on_progress: Optional[Callable[[Job, Dict], None]] = None
+    ) -> Job:
+        """
+        Queue a job that calls handler(item) for every item in order
+
+        Args:
+            items: Work items
+            handler: Returns a result dict (with a 'success' key) for one item
+            owner: Opaque owner id used to restrict who may poll the job
+            kind: Label reported in the job status
+            on_progress: Called with (job, result) after each item, and with
+                (job, None) once the job has finished
+        """
+        self._prune()
+        job = Job(owner, kind, list(items))
+        with self._lock:
+            self._jobs[job.id] = job
+        # The job's log records keep the ID of the request that queued it
+        self._executor.submit(bind_context(self._run), job, handler, on_progress)
+        return job
+
+    def _run(self, job: Job, handler: Callable[[Any], Dict], on_progress) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            for item in job.items:
+                result = handler(item)
+                job.add_result(result)
+                if on_progress:
+                    on_progress(job, result)
+            job.status = JOB_COMPLETED
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.id, e)
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            # Items are no longer needed once processed
+            job.items = []
+        if on_progress:
+            on_progress(job, None)
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Job]:
+        """Look up a job; returns None if unknown or owned by someone else"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.done and job.finished_at and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of known jobs per state"""
+        with self._lock:
+            counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_COMPLETED: 0, JOB_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
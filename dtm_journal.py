@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+DTM Journal - durable write-ahead queue of task actions
+
+Start/pause/resume/end requests are written to a SQLite journal with the
+time the user meant (frozen when the action is queued) and the web request
+returns at once. Replay workers send them to DTM in the background, strictly
+in order per web session, and retry with exponential backoff while DTM is
+down, so neither an outage nor a slow upstream loses the user's timing.
+
+Claims are atomic across processes (BEGIN IMMEDIATE), so every gunicorn
+worker can run replay workers against the same journal file.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from dtm_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dtm_actions.db')
+
+# Defaults for the web app's replay workers
+DEFAULT_REPLAY_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_RETRY_BASE = 5.0
+DEFAULT_RETRY_MAX = 300.0
+# A running action whose worker died is handed out again after this many seconds
+DEFAULT_CLAIM_LEASE = 300.0
+# Finished actions are kept this long for /api/actions/<id>
+DEFAULT_ACTION_RETENTION = 86400.0
+
+# Action states
+ACTION_QUEUED = 'queued'
+ACTION_RUNNING = 'running'
+ACTION_DONE = 'done'
+ACTION_FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    seq             INTEGER PRIMARY KEY AUTOINCREMENT,  -- replay order
+    id              TEXT NOT NULL UNIQUE,
+    session_id      TEXT NOT NULL,
+    username        TEXT,
+    kind            TEXT NOT NULL,  -- start, pause, resume or end
+    task_id         TEXT,
+    payload         TEXT NOT NULL,  -- JSON arguments, intended time included
+    status          TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at      REAL,
+    request_id      TEXT,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL,
+    result          TEXT,
+    error           TEXT
+);
+CREATE INDEX IF NOT EXISTS actions_ready ON actions (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS actions_by_session ON actions (session_id, status, seq);
+"""
+
+
+class RetryAction(Exception):
+    """
+    DTM could not take the action now: retry later
+
+    A refusal by the rate limiter or circuit breaker does not use up an
+    attempt; a network error or 5xx does (count_attempt), so a server that
+    keeps failing eventually fails the action.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0, count_attempt: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.count_attempt = count_attempt
+
+
+class ActionAbandoned(Exception):
+    """The action can never succeed (e.g. the session logged out): fail it now"""
+
+
+def public_view(action: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-friendly status of an action for its owner (no session or request IDs)"""
+    return {
+        'action_id': action['id'],
+        'kind': action['kind'],
+        'task_id': action['task_id'],
+        'status': action['status'],
+        'intended_at': action['payload'].get('when') or action['payload'].get('start_datetime'),
+        'attempts': action['attempts'],
+        'error': action['error'],
+        'result': action['result'],
+        'created_at': action['created_at'],
+        'updated_at': action['updated_at'],
+        'next_attempt_at': action['next_attempt_at'] if action['status'] == ACTION_QUEUED else None
+    }
+
+
+class ActionJournal:
+    """SQLite-backed per-session FIFO of task actions with background replay"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_JOURNAL_PATH,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_base: float = DEFAULT_RETRY_BASE,
+        retry_max: float = DEFAULT_RETRY_MAX,
+        lease: float = DEFAULT_CLAIM_LEASE,
+        retention: float = DEFAULT_ACTION_RETENTION
+    ):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway journal)
+            max_attempts: Failed sends before an action is given up
+            retry_base: Seconds before the first retry, doubled on each further one
+            retry_max: Upper bound for a single retry delay
+            lease: Seconds after which a running action is assumed orphaned
+            retention: Seconds finished actions are kept
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.retention = retention
+        # Autocommit; multi-statement writes open their own transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._claims = 0
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            # Every queued action must survive a crash right after the 202
+            self._conn.execute('PRAGMA synchronous=FULL')
+            self._conn.executescript(SCHEMA)
+            self._columns = [column[0] for column in self._conn.execute('SELECT * FROM actions LIMIT 0').description]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- queue -------------------------------------------------------------
+
+    def enqueue(
+        self,
+        session_id: str,
+        username: Optional[str],
+        kind: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue an action behind the session's earlier ones and wake a worker
+
+        Args:
+            session_id: Web session the action belongs to (replay order is per session)
+            username: DTM account, for display and monitoring
+            kind: start, pause, resume or end
+            payload: Arguments for the bot call, with the intended time already filled in
+            task_id: Task the action applies to (None for start)
+        """
+        now = time.time()
+        action_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO actions (id, session_id, username, kind, task_id, payload, status, '
+                'next_attempt_at, request_id, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    action_id, session_id, username, kind, task_id,
+                    json.dumps(payload, separators=(',', ':')), ACTION_QUEUED,
+                    now, request_id_var.get(), now, now
+                )
+            )
+        self._wake.set()
+        return self.get(action_id)
+
+    def get(self, action_id: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """An action as a dict; None if unknown or owned by another session"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM actions WHERE id = ?', (action_id,)).fetchone()
+        if row is None:
+            return None
+        action = self._to_dict(row)
+        if session_id is not None and action['session_id'] != session_id:
+            return None
+        return action
+
+    def pending(self, session_id: str) -> List[Dict[str, Any]]:
+        """A session's queued and running actions, in replay order"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM actions WHERE session_id = ? AND status IN (?, ?) ORDER BY seq',
+                (session_id, ACTION_QUEUED, ACTION_RUNNING)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _to_dict(self, row: tuple) -> Dict[str, Any]:
+        action = dict(zip(self._columns, row))
+        action['payload'] = json.loads(action['payload'])
+        action['result'] = json.loads(action['result']) if action['result'] else None
+        return action
+
+    # -- replay ------------------------------------------------------------
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the next ready action, or None
+
+        An action is ready when its retry time has come and no earlier action
+        of the same session is still queued or running.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Hand orphaned actions (their worker died) out again
+                self._conn.execute(
+                    'UPDATE actions SET status = ?, claimed_at = NULL WHERE status = ? AND claimed_at < ?',
+                    (ACTION_QUEUED, ACTION_RUNNING, now - self.lease)
+                )
+                row = self._conn.execute(
+                    'SELECT seq FROM actions AS a WHERE status = ? AND next_attempt_at <= ? '
+                    'AND NOT EXISTS (SELECT 1 FROM actions AS b WHERE b.session_id = a.session_id '
+                    'AND b.seq < a.seq AND b.status IN (?, ?)) '
+                    'ORDER BY seq LIMIT 1',
+                    (ACTION_QUEUED, now, ACTION_QUEUED, ACTION_RUNNING)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        'UPDATE actions SET status = ?, claimed_at = ?, updated_at = ? WHERE seq = ?',
+                        (ACTION_RUNNING, now, now, row[0])
+                    )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            if row is None:
+                return None
+            self._claims += 1
+            if self._claims % 100 == 0:
+                self._prune(now)
+            action_row = self._conn.execute('SELECT * FROM actions WHERE seq = ?', (row[0],)).fetchone()
+        return self._to_dict(action_row)
+
+    def complete(self, action_id: str, result: Dict[str, Any]) -> None:
+        """Mark an action as sent successfully"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE actions SET status = ?, attempts = attempts + 1, result = ?, error = NULL, '
+                'claimed_at = NULL, updated_at = ? WHERE id = ?',
+                (ACTION_DONE, json.dumps(result, separators=(',', ':')), now, action_id)
+            )
+
+    def retry(self, action_id: str, error: str, delay: Optional[float] = None, count_attempt: bool = True) -> str:
+        """
+        Put an action back in the queue after a failed send, or give it up
+
+        Args:
+            error: Why the send failed (shown to the user)
+            delay: Seconds until the next attempt (default: exponential backoff)
+            count_attempt: False when DTM was never contacted
+
+        Returns:
+            The action's new status (queued or failed)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT attempts FROM actions WHERE id = ?', (action_id,)).fetchone()
+            attempts = (row[0] if row else 0) + (1 if count_attempt else 0)
+            if attempts >= self.max_attempts:
+                status, next_attempt = ACTION_FAILED, now
+            else:
+                status = ACTION_QUEUED
+                if delay is None:
+                    delay = min(self.retry_base * (2 ** max(0, attempts - 1)), self.retry_max)
+                next_attempt = now + max(delay, 0.0)
+            self._conn.execute(
+                'UPDATE actions SET status = ?, attempts = ?, error = ?, next_attempt_at = ?, '
+                'claimed_at = NULL, updated_at = ? WHERE id = ?',
+                (status, attempts, error, next_attempt, now, action_id)
+            )
+        return status
+
+    def fail(self, action_id: str, error: str) -> None:
+        """Give an action up without further retries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE actions SET status = ?, error = ?, claimed_at = NULL, updated_at = ? WHERE id = ?',
+                (ACTION_FAILED, error, now, action_id)
+            )
+
+    def _prune(self, now: float) -> None:
+        """Forget finished actions older than the retention period (lock held)"""
+        self._conn.execute(
+            'DELETE FROM actions WHERE status IN (?, ?) AND updated_at < ?',
+            (ACTION_DONE, ACTION_FAILED, now - self.retention)
+        )
+
+    def next_wakeup(self) -> Optional[float]:
+        """Seconds until the earliest queued action is due (None if nothing is queued)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MIN(next_attempt_at) FROM actions WHERE status = ?', (ACTION_QUEUED,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def replay_one(
+        self,
+        handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> bool:
+        """
+        Claim one ready action and send it through handler
+
+        handler returns a result dict whose 'success' key decides between done
+        and a retry; it may raise RetryAction (DTM unreachable) or
+        ActionAbandoned (never retry). on_update gets the action after every
+        state change.
+
+        Returns:
+            False if no action was ready
+        """
+        action = self.claim()
+        if action is None:
+            return False
+
+        token = request_id_var.set(action['request_id'])
+        try:
+            try:
+                result = handler(action)
+            except RetryAction as e:
+                if e.count_attempt:
+                    status = self.retry(action['id'], str(e))
+                else:
+                    status = self.retry(action['id'], str(e), delay=max(e.retry_after, 1.0), count_attempt=False)
+                if status == ACTION_FAILED:
+                    logger.warning("Action %s (%s) failed after %d attempts",
+                                   action['id'], action['kind'], self.max_attempts)
+            except ActionAbandoned as e:
+                logger.warning("Action %s (%s) abandoned: %s", action['id'], action['kind'], e)
+                self.fail(action['id'], str(e))
+            except Exception as e:
+                logger.exception("Action %s (%s) raised: %s", action['id'], action['kind'], e)
+                self.retry(action['id'], str(e))
+            else:
+                if result.get('success'):
+                    self.complete(action['id'], result)
+                else:
+                    status = self.retry(action['id'], result.get('message') or 'DTM rejected the action')
+                    if status == ACTION_FAILED:
+                        logger.warning("Action %s (%s) failed after %d attempts",
+                                       action['id'], action['kind'], self.max_attempts)
+            if on_update is not None:
+                on_update(self.get(action['id']))
+        finally:
+            request_id_var.reset(token)
+        return True
+
+    def start(
+        self,
+        handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+        workers: int = DEFAULT_REPLAY_WORKERS,
+        poll_interval: float = 5.0
+    ) -> None:
+        """
+        Start background replay workers (idempotent)
+
+        Args:
+            handler: Sends one action to DTM (see replay_one)
+            on_update: Called with the action after each state change
+            workers: Threads replaying actions of different sessions at once
+            poll_interval: Longest sleep between looks at the journal (other
+                processes may queue actions without waking this one)
+        """
+        if any(worker.is_alive() for worker in self._workers):
+            return
+        self._stop.clear()
+        self._workers = [
+            threading.Thread(
+                target=self._replay_loop,
+                args=(handler, on_update, poll_interval),
+                name=f'dtm-replay-{n}',
+                daemon=True
+            )
+            for n in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _replay_loop(self, handler, on_update, poll_interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.replay_one(handler, on_update):
+                    continue
+                wait = self.next_wakeup()
+            except Exception as e:
+                logger.exception("Action replay error: %s", e)
+                wait = poll_interval
+            timeout = poll_interval if wait is None else min(wait, poll_interval)
+            if self._wake.wait(timeout):
+                self._wake.clear()
+
+    def shutdown(self) -> None:
+        """Stop the replay workers; unfinished actions stay in the journal"""
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of journalled actions per state"""
+        counts = {ACTION_QUEUED: 0, ACTION_RUNNING: 0, ACTION_DONE: 0, ACTION_FAILED: 0}
+        with self._lock:
+            for status, count in self._conn.execute('SELECT status, COUNT(*) FROM actions GROUP BY status'):
+                counts[status] = count
+        return counts
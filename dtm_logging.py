@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+DTM Logging - structured, non-blocking logging with per-request correlation IDs
+
+The web app logs JSON lines (or plain text) through a QueueHandler: the
+request thread only enqueues the record, and a QueueListener thread formats
+and writes it, so a slow stdout/journal never stalls a request. Every record
+carries the request ID of the web request (or background job) it belongs to.
+
+Modules log through logging.getLogger(__name__); verbose upstream
+diagnostics are emitted at DEBUG with lazy %-formatting, so they cost next
+to nothing unless DTM_LOG_LEVEL=debug.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+# Correlation ID of the web request or job being handled by this thread/task
+request_id_var: 'contextvars.ContextVar[Optional[str]]' = contextvars.ContextVar(
+    'dtm_request_id', default=None
+)
+
+# Longest X-Request-ID accepted from a client or proxy
+MAX_REQUEST_ID_LENGTH = 64
+
+# LogRecord attributes that are not user-supplied extra fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def new_request_id(candidate: Optional[str] = None) -> str:
+    """A client-supplied request ID if it looks sane, else a fresh random one"""
+    if candidate and len(candidate) <= MAX_REQUEST_ID_LENGTH and candidate.isprintable() and ' ' not in candidate:
+        return candidate
+    return uuid.uuid4().hex
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    Wrap func so it runs with the caller's context variables (request ID)
+
+    Thread pools do not carry contextvars over; each call gets its own copy
+    of the context captured here, so the wrapper is safe to run concurrently.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every record with the current request ID (None outside requests)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and tracebacks now: they may not survive the trip to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class PlainFormatter(logging.Formatter):
+    """Human-readable lines with the request ID, for running the app in a terminal"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = '-'
+        return super().format(record)
+
+
+def configure_logging(level: str = 'info', fmt: str = 'json', stream=None) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to a background writer thread
+
+    Calling it again replaces the previous configuration.
+
+    Args:
+        level: Root log level name (debug, info, warning, error)
+        fmt: 'json' for JSON lines, 'plain' for human-readable text
+        stream: Where records are written (default stderr)
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(PlainFormatter() if fmt == 'plain' else JSONFormatter())
+
+    records: 'queue.Queue[logging.LogRecord]' = queue.Queue(-1)
+    _queue_handler = _QueueHandler(records)
+    # Handler filters run in the thread that logged, where the request ID is still set
+    _queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and detach the queue handler (idempotent)"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_console_logging(level: int = logging.INFO) -> None:
+    """Plain message-only output on stdout, for the command line tools"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+atexit.register(shutdown_logging)
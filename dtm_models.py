@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+DTM Models - typed results returned by DTMBot
+
+myTaskList rows are parsed here once, so the web API and the browser deal
+with plain fields instead of re-parsing HTML fragments.
+"""
+
+import html
+import re
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Task UUID inside the actions column, e.g. href='task/updatetask/1/d8286acf-...'
+TASK_UUID_RE = re.compile(r'task/updatetask/\d+/([a-f0-9\-]{36})', re.IGNORECASE)
+
+# "01:30" or "1:30:15" in the duration column
+DURATION_RE = re.compile(r'(\d+):(\d{2})(?::(\d{2}))?')
+
+# Start/end cells are normally "YY-MM-DD HH:MM:SS"; the rest are tolerated variants
+TASK_DATETIME_FORMATS = (
+    '%y-%m-%d %H:%M:%S',
+    '%y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%y-%m-%d %I:%M:%S %p',
+    '%y-%m-%d %I:%M %p',
+    '%Y-%m-%d %I:%M:%S %p',
+    '%Y-%m-%d %I:%M %p',
+)
+
+# First cell of the placeholder row DataTables sends for an empty day
+NO_RECORDS = 'No Records'
+
+
+@dataclass
+class StartTaskResult:
+    """
+    Outcome of DTMBot.start_task
+
+    Truthy when the task was started, so existing `if bot.start_task(...)`
+    callers keep working.
+    """
+
+    success: bool
+    task_id: Optional[str] = None     # UUID used by end/pause/resume, if resolved
+    started_at: Optional[str] = None  # "YYYY-MM-DD HH:MM:SS AM/PM" sent to DTM
+    message: str = ''
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TaskStatus(str, Enum):
+    """Normalised state of a myTaskList row"""
+
+    ONGOING = 'ongoing'
+    PAUSED = 'paused'
+    COMPLETED = 'completed'
+    UNKNOWN = 'unknown'
+
+    @classmethod
+    def from_text(cls, text: str) -> 'TaskStatus':
+        """Map DTM's status label ("On Going", "Pause", "On Hold", ...) to a status"""
+        lowered = text.lower()
+        if 'on going' in lowered or 'ongoing' in lowered:
+            return cls.ONGOING
+        if 'pause' in lowered or 'hold' in lowered:
+            return cls.PAUSED
+        if any(word in lowered for word in ('complete', 'finish', 'ended', 'done')):
+            return cls.COMPLETED
+        return cls.UNKNOWN
+
+
+def strip_html(value: Any) -> str:
+    """Plain text of a myTaskList cell (tags removed, entities decoded)"""
+    if not isinstance(value, str):
+        return '' if value is None else str(value)
+    return html.unescape(HTML_TAG_RE.sub('', value)).strip()
+
+
+def extract_task_uuid(row: List) -> Optional[str]:
+    """Return the task UUID from a myTaskList row's actions column, if present"""
+    if len(row) > 9 and isinstance(row[9], str):
+        match = TASK_UUID_RE.search(row[9])
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_task_datetime(text: str) -> Optional[datetime]:
+    """Parse a start/end cell such as "25-11-03 10:00:00"; None if empty or unknown"""
+    text = text.strip()
+    if not text:
+        return None
+    for fmt in TASK_DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Seconds in a duration cell such as "01:30" or "1:30:15"; None if absent"""
+    match = DURATION_RE.search(text)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds or 0)
+
+
+@dataclass(slots=True)
+class TaskRow:
+    """
+    One myTaskList row, parsed once on the server
+
+    DTM returns each row as ten HTML fragments:
+    [#, Category/Project, Activity, TaskType, Task, StartTime, EndTime, Duration, Status, Actions]
+    """
+
+    index: str
+    uuid: Optional[str]
+    category: str
+    activity: str
+    task_type: str
+    description: str
+    start: Optional[datetime]
+    end: Optional[datetime]
+    duration_seconds: Optional[int]
+    status: TaskStatus
+    status_text: str
+    raw: Optional[List] = None
+
+    @classmethod
+    def from_row(cls, row: List, keep_raw: bool = False) -> 'TaskRow':
+        cells = [strip_html(cell) for cell in row[:9]]
+        cells += [''] * (9 - len(cells))
+        return cls(
+            index=cells[0],
+            uuid=extract_task_uuid(row),
+            category=cells[1],
+            activity=cells[2],
+            task_type=cells[3],
+            description=cells[4],
+            start=parse_task_datetime(cells[5]),
+            end=parse_task_datetime(cells[6]),
+            duration_seconds=parse_duration(cells[7]),
+            status=TaskStatus.from_text(cells[8]),
+            status_text=cells[8],
+            raw=row if keep_raw else None
+        )
+
+    @classmethod
+    def from_rows(cls, rows: List[List], keep_raw: bool = False) -> List['TaskRow']:
+        """Parse a DataTables data array, skipping the "No Records" placeholder"""
+        return [
+            cls.from_row(row, keep_raw)
+            for row in rows or []
+            if row and row[0] != NO_RECORDS
+        ]
+
+    @property
+    def is_open(self) -> bool:
+        """True while the task is on going or paused"""
+        return self.status in (TaskStatus.ONGOING, TaskStatus.PAUSED)
+
+    def to_dict(self, include_raw: bool = False) -> Dict[str, Any]:
+        """Compact JSON-friendly form served by the web API"""
+        data = {
+            'index': self.index,
+            'task_id': self.uuid,
+            'category': self.category,
+            'activity': self.activity,
+            'task_type': self.task_type,
+            'description': self.description,
+            'start': self.start.isoformat() if self.start else None,
+            'end': self.end.isoformat() if self.end else None,
+            'duration_seconds': self.duration_seconds,
+            'status': self.status.value,
+            'status_text': self.status_text
+        }
+        if include_raw:
+            data['raw'] = self.raw
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TaskRow':
+        """Rebuild a TaskRow from its to_dict() form"""
+        start, end = data.get('start'), data.get('end')
+        return cls(
+            index=data.get('index', ''),
+            uuid=data.get('task_id'),
+            category=data.get('category', ''),
+            activity=data.get('activity', ''),
+            task_type=data.get('task_type', ''),
+            description=data.get('description', ''),
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+            duration_seconds=data.get('duration_seconds'),
+            status=TaskStatus(data.get('status', TaskStatus.UNKNOWN.value)),
+            status_text=data.get('status_text', ''),
+            raw=data.get('raw')
+        )
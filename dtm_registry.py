@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+DTM Registry - bounded store of per-session DTMBot instances
+
+Every logged-in browser session owns a DTMBot (a requests.Session with its
+own connection pool and cookies). The registry closes bots that have been
+idle longer than idle_ttl, evicts the least recently used bot once max_size
+is reached, and reaps idle bots on a background thread, so abandoned
+sessions do not pile up in a long-running web process.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the web app's bot registry
+DEFAULT_BOT_IDLE_TTL = 7200.0
+DEFAULT_MAX_BOTS = 1000
+DEFAULT_REAP_INTERVAL = 60.0
+
+
+class BotRegistry:
+    """Thread-safe session_id -> bot map with idle TTL and LRU eviction"""
+
+    def __init__(
+        self,
+        idle_ttl: float = DEFAULT_BOT_IDLE_TTL,
+        max_size: int = DEFAULT_MAX_BOTS,
+        reap_interval: float = DEFAULT_REAP_INTERVAL
+    ):
+        """
+        Args:
+            idle_ttl: Seconds a bot may go unused before it is closed
+            max_size: Most bots kept at once (least recently used are evicted)
+            reap_interval: Seconds between background sweeps for idle bots
+        """
+        self.idle_ttl = idle_ttl
+        self.max_size = max_size
+        self.reap_interval = reap_interval
+        # session_id -> [bot, last_used], oldest use first
+        self._bots: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.removed = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[Any]:
+        """Bot of a session (marking it as used), or None if unknown or idle too long"""
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._bots.get(session_id)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if now - entry[1] > self.idle_ttl:
+                del self._bots[session_id]
+                self.expired += 1
+                expired_bot = entry[0]
+            else:
+                entry[1] = now
+                self._bots.move_to_end(session_id)
+                return entry[0]
+        self._close(expired_bot)
+        return None
+
+    def put(self, session_id: str, bot: Any) -> Any:
+        """Register a session's bot, evicting least recently used bots beyond max_size"""
+        evicted: List[Any] = []
+        with self._lock:
+            previous = self._bots.pop(session_id, None)
+            if previous is not None and previous[0] is not bot:
+                evicted.append(previous[0])
+            self._bots[session_id] = [bot, time.monotonic()]
+            self.created += 1
+            while len(self._bots) > self.max_size:
+                _, (old_bot, _) = self._bots.popitem(last=False)
+                evicted.append(old_bot)
+                self.evicted += 1
+        for old_bot in evicted:
+            self._close(old_bot)
+        return bot
+
+    def touch(self, session_id: Optional[str]) -> None:
+        """Mark a session's bot as used without fetching it (e.g. from a background job)"""
+        with self._lock:
+            entry = self._bots.get(session_id)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._bots.move_to_end(session_id)
+
+    def remove(self, session_id: Optional[str]) -> bool:
+        """Drop and close a session's bot (logout or expired DTM session)"""
+        with self._lock:
+            entry = self._bots.pop(session_id, None)
+            if entry is None:
+                return False
+            self.removed += 1
+        self._close(entry[0])
+        return True
+
+    def __contains__(self, session_id: object) -> bool:
+        with self._lock:
+            return session_id in self._bots
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._bots)
+
+    def reap(self) -> int:
+        """
+        Close every bot idle for longer than idle_ttl
+
+        Returns:
+            Number of bots closed
+        """
+        cutoff = time.monotonic() - self.idle_ttl
+        idle: List[Any] = []
+        with self._lock:
+            # Oldest use first, so stop at the first bot that is still fresh
+            for session_id, (bot, last_used) in list(self._bots.items()):
+                if last_used > cutoff:
+                    break
+                del self._bots[session_id]
+                idle.append(bot)
+            self.expired += len(idle)
+        for bot in idle:
+            self._close(bot)
+        return len(idle)
+
+    def _close(self, bot: Any) -> None:
+        try:
+            bot.close()
+        except Exception as e:
+            logger.warning("Error closing bot: %s", e)
+
+    def start_reaper(self) -> None:
+        """Start the background thread that reaps idle bots (idempotent)"""
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._stop.clear()
+            self._reaper = threading.Thread(target=self._reap_loop, name='dtm-bot-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while not self._stop.wait(self.reap_interval):
+            try:
+                reaped = self.reap()
+                if reaped:
+                    logger.info("Closed %d idle bot(s), %d live", reaped, len(self))
+            except Exception as e:
+                logger.exception("Bot reaper error: %s", e)
+
+    def shutdown(self) -> None:
+        """Stop the reaper and close every registered bot"""
+        self._stop.set()
+        with self._lock:
+            bots = [bot for bot, _ in self._bots.values()]
+            self._bots.clear()
+        for bot in bots:
+            self._close(bot)
+
+    def stats(self) -> Dict[str, Any]:
+        """Live and evicted bot counters for monitoring"""
+        with self._lock:
+            return {
+                'live': len(self._bots),
+                'max_size': self.max_size,
+                'idle_ttl': self.idle_ttl,
+                'created': self.created,
+                'evicted': self.evicted,
+                'expired': self.expired,
+                'removed': self.removed
+            }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+DTM Sessions - shared storage for logged-in DTM sessions
+
+Each web session's upstream state (cookie jar, CSRF token, username) is
+saved to a store every worker can reach, so any gunicorn worker, or the
+same worker after a restart, can rebuild the DTMBot on demand.
+
+Backends:
+    sqlite:///path/to/sessions.db (or a plain path)  - single host, many workers
+    redis://host:6379/0                              - needs the optional redis package
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Defaults for the web app
+DEFAULT_SESSION_STORE = 'sqlite:///' + os.path.join(APP_DIR, 'dtm_sessions.db')
+DEFAULT_SESSION_TTL = 43200.0
+DEFAULT_SECRET_KEY_FILE = os.path.join(APP_DIR, '.dtm_secret_key')
+
+
+class SessionStore(ABC):
+    """Interface of a session store: JSON-serialisable state per session id"""
+
+    def __init__(self, ttl: float = DEFAULT_SESSION_TTL):
+        """
+        Args:
+            ttl: Seconds a saved session is kept after its last save
+        """
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Saved state of a session, or None if unknown or expired"""
+
+    @abstractmethod
+    def set(self, session_id: str, state: Dict[str, Any]) -> None:
+        """Save a session's state, restarting its TTL"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Forget a session"""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite file shared by every worker on the host"""
+
+    # Expired rows are purged on roughly one save in this many
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str, ttl: float = DEFAULT_SESSION_TTL):
+        super().__init__(ttl)
+        self.path = path
+        if path != ':memory:':
+            # The rows hold live DTM cookies and CSRF tokens (SQLite gives the WAL files the same mode)
+            make_private_file(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        self._saves = 0
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'session_id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT state FROM sessions WHERE session_id = ? AND expires_at > ?',
+                (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id: str, state: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)',
+                (session_id, json.dumps(state, separators=(',', ':')), now + self.ttl)
+            )
+            self._saves += 1
+            if self._saves % self.PURGE_EVERY == 0:
+                self._conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis (or any Redis-compatible server), expiring via SETEX"""
+
+    def __init__(self, url: str, ttl: float = DEFAULT_SESSION_TTL, prefix: str = 'dtm:session:'):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("The redis package is required for a redis:// session store (pip install redis)")
+        super().__init__(ttl)
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        value = self._client.get(self.prefix + session_id)
+        return json.loads(value) if value else None
+
+    def set(self, session_id: str, state: Dict[str, Any]) -> None:
+        self._client.setex(
+            self.prefix + session_id,
+            int(self.ttl),
+            json.dumps(state, separators=(',', ':'))
+        )
+
+    def delete(self, session_id: str) -> None:
+        self._client.delete(self.prefix + session_id)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def make_private_file(path: str) -> None:
+    """Create path readable by the owner only, or restrict an existing file to the owner"""
+    try:
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+    except FileExistsError:
+        os.chmod(path, 0o600)
+
+
+def create_session_store(url: str = DEFAULT_SESSION_STORE, ttl: float = DEFAULT_SESSION_TTL) -> SessionStore:
+    """Build a session store from a URL (redis://, rediss://, sqlite:/// or a file path)"""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore(url, ttl)
+    if url.startswith('sqlite:///'):
+        url = url[len('sqlite:///'):]
+    return SQLiteSessionStore(url, ttl)
+
+
+def load_secret_key(path: str = DEFAULT_SECRET_KEY_FILE) -> bytes:
+    """
+    Flask secret key shared by every worker and kept across restarts
+
+    DTM_SECRET_KEY wins when set; otherwise the key is read from path, which
+    is created (readable by the owner only) on first use.
+    """
+    env_key = os.environ.get('DTM_SECRET_KEY')
+    if env_key:
+        return env_key.encode()
+
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another worker (or an earlier run) created it; wait for its write to land
+        for _ in range(50):
+            with open(path, 'rb') as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.1)
+        raise RuntimeError(f"Secret key file {path} is empty")
+
+    key = secrets.token_hex(32).encode()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
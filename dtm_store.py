@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+DTM Store - local SQLite history of myTaskList listings
+
+Each day's listing is synced from DTMBot.get_my_tasks and kept on disk.
+A past day whose tasks are all finished is marked closed and served from
+the store from then on; today, future days, empty days (tasks may still be
+backfilled) and days that still hold an on going or paused task are
+refreshed upstream. Starting or changing a task reopens its days, and a
+caller can always ask for a refresh.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from dtm_cache import SingleFlight
+from dtm_models import TaskRow
+
+# Default database files (the CLI keeps its store next to ~/.dtm_config.json)
+DEFAULT_TASK_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dtm_tasks.db')
+DEFAULT_CLI_TASK_STORE_PATH = os.path.expanduser('~/.dtm_tasks.db')
+
+# Rows requested per page while syncing a whole day
+SYNC_PAGE_SIZE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    username   TEXT NOT NULL,
+    task_key   TEXT NOT NULL,  -- task UUID, or "<day>#<index>" when DTM shows none
+    start_date TEXT,
+    status     TEXT NOT NULL,
+    payload    TEXT NOT NULL,  -- TaskRow.to_dict() as JSON
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (username, task_key)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (username, status);
+CREATE INDEX IF NOT EXISTS tasks_by_start ON tasks (username, start_date);
+
+CREATE TABLE IF NOT EXISTS day_tasks (
+    username TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    task_key TEXT NOT NULL,
+    PRIMARY KEY (username, day, position)
+);
+
+CREATE TABLE IF NOT EXISTS days (
+    username      TEXT NOT NULL,
+    day           TEXT NOT NULL,
+    closed        INTEGER NOT NULL DEFAULT 0,
+    total_hours   TEXT,
+    task_status   TEXT,
+    total_records INTEGER,
+    synced_at     REAL NOT NULL,
+    PRIMARY KEY (username, day)
+);
+"""
+
+
+def task_key(day: str, task: TaskRow) -> str:
+    """Primary key for a task: its UUID, or a per-day synthetic key"""
+    return task.uuid or f"{day}#{task.index}"
+
+
+class TaskStore:
+    """Thread-safe SQLite store of per-user, per-day task listings"""
+
+    def __init__(self, path: str = DEFAULT_TASK_STORE_PATH):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # The calendar, ongoing list and daily list often sync the same day at once
+        self._flight = SingleFlight()
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+            # Stores written before empty days stayed open
+            self._conn.execute('UPDATE days SET closed = 0 WHERE closed = 1 AND total_records = 0')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- storage -----------------------------------------------------------
+
+    def save_day(self, username: str, day: str, result: Dict, closed: bool) -> None:
+        """Replace the stored listing of one day with a get_my_tasks result"""
+        now = time.time()
+        tasks: List[TaskRow] = result['tasks']
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM day_tasks WHERE username = ? AND day = ?',
+                (username, day)
+            )
+            for position, task in enumerate(tasks):
+                key = task_key(day, task)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)',
+                    (
+                        username, key,
+                        task.start.strftime('%Y-%m-%d') if task.start else day,
+                        task.status.value,
+                        json.dumps(task.to_dict(), separators=(',', ':')),
+                        now
+                    )
+                )
+                self._conn.execute(
+                    'INSERT INTO day_tasks VALUES (?, ?, ?, ?)',
+                    (username, day, position, key)
+                )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    username, day, int(closed),
+                    result.get('total_hours', '0:00'),
+                    result.get('task_status', ''),
+                    result.get('total_records', len(tasks)),
+                    now
+                )
+            )
+
+    def load_day(self, username: str, day: str) -> Optional[Dict]:
+        """Stored listing of a day in get_my_tasks form, or None if never synced"""
+        with self._lock:
+            meta = self._conn.execute(
+                'SELECT closed, total_hours, task_status, total_records, synced_at '
+                'FROM days WHERE username = ? AND day = ?',
+                (username, day)
+            ).fetchone()
+            if meta is None:
+                return None
+            rows = self._conn.execute(
+                'SELECT t.payload FROM day_tasks d '
+                'JOIN tasks t ON t.username = d.username AND t.task_key = d.task_key '
+                'WHERE d.username = ? AND d.day = ? ORDER BY d.position',
+                (username, day)
+            ).fetchall()
+        closed, total_hours, task_status, total_records, synced_at = meta
+        return {
+            'success': True,
+            'tasks': [TaskRow.from_dict(json.loads(payload)) for (payload,) in rows],
+            'total_hours': total_hours,
+            'task_status': task_status,
+            'total_records': total_records,
+            'closed': bool(closed),
+            'synced_at': synced_at
+        }
+
+    def closed_days(self, username: str, days: List[str]) -> set:
+        """Subset of days that are closed for username"""
+        if not days:
+            return set()
+        placeholders = ','.join('?' * len(days))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT day FROM days WHERE username = ? AND closed = 1 AND day IN ({placeholders})',
+                (username, *days)
+            ).fetchall()
+        return {day for (day,) in rows}
+
+    def reopen_day(self, username: str, day: str) -> None:
+        """Force a day to be fetched again (e.g. after a task was started on it)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE days SET closed = 0 WHERE username = ? AND day = ?',
+                (username, day)
+            )
+
+    def reopen_task(self, username: str, task_id: str, day: Optional[str] = None) -> None:
+        """Force every day listing a task, plus day, to be fetched again (e.g. after it was ended)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE days SET closed = 0 WHERE username = ? AND (day = ? OR day IN '
+                '(SELECT day FROM day_tasks WHERE username = ? AND task_key = ?))',
+                (username, day, username, task_id)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            tasks, = self._conn.execute('SELECT COUNT(*) FROM tasks').fetchone()
+            days, closed = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(closed), 0) FROM days'
+            ).fetchone()
+        return {'tasks': tasks, 'days': days, 'closed_days': closed}
+
+    # -- sync --------------------------------------------------------------
+
+    def sync_day(self, bot, day: str) -> Dict:
+        """
+        Fetch every page of a day's listing from DTM and store it
+
+        Concurrent syncs of the same account and day share one upstream fetch.
+
+        Returns:
+            The get_my_tasks-style result (success False if any page failed;
+            nothing is stored in that case)
+        """
+        result = self._flight.do(
+            (bot.base_url, bot.username, day),
+            lambda: self._sync_day(bot, day)
+        )
+        # Every waiter gets the same result; hand out copies they can modify
+        return {**result, 'tasks': list(result['tasks'])}
+
+    def _sync_day(self, bot, day: str) -> Dict:
+        tasks: List[TaskRow] = []
+        start = 0
+        while True:
+            result = bot.get_my_tasks(day, start=start, length=SYNC_PAGE_SIZE)
+            if not result.get('success'):
+                return result
+            tasks.extend(result['tasks'])
+            start += SYNC_PAGE_SIZE
+            if len(result['tasks']) < SYNC_PAGE_SIZE or start >= result.get('total_records', 0):
+                break
+
+        result['tasks'] = tasks
+        result.pop('start', None)
+        result.pop('length', None)
+        today = datetime.now().strftime('%Y-%m-%d')
+        # An empty past day stays open: tasks can still be backfilled for it
+        closed = day < today and bool(tasks) and not any(task.is_open for task in tasks)
+        self.save_day(bot.username, day, result, closed)
+        result['closed'] = closed
+        return result
+
+    def get_day(self, bot, day: str, refresh: bool = False) -> Dict:
+        """
+        A day's tasks: closed days from the store, anything else synced upstream
+
+        Args:
+            refresh: Sync upstream even if the day is closed
+        """
+        if not bot.username:
+            return bot.get_my_tasks(day)
+        if not refresh:
+            stored = self.load_day(bot.username, day)
+            if stored is not None and stored['closed']:
+                return stored
+        return self.sync_day(bot, day)
+
+    def get_days(
+        self,
+        bot,
+        days: List[str],
+        max_workers: Optional[int] = None,
+        refresh: bool = False
+    ) -> Dict[str, Dict]:
+        """
+        Tasks for many days at once, keyed by day
+
+        Closed days are read from the store (unless refresh); every other day
+        is synced upstream, concurrently over the bot's connection pool.
+        """
+        if not bot.username:
+            return dict(zip(days, bot.map_concurrent(bot.get_my_tasks, days, max_workers)))
+
+        closed = set() if refresh else self.closed_days(bot.username, days)
+        stale = [day for day in days if day not in closed]
+        results = dict(zip(stale, bot.map_concurrent(
+            lambda day: self.sync_day(bot, day), stale, max_workers
+        )))
+        for day in closed:
+            results[day] = self.load_day(bot.username, day)
+        return results
+
+    def get_ongoing(self, bot, days: int = 7, max_workers: Optional[int] = None) -> Dict:
+        """
+        On going and paused tasks over the last few days (see DTMBot.get_ongoing_tasks)
+
+        Closed days cannot hold open tasks, so they are skipped entirely and
+        only the rest of the window is synced upstream (concurrently).
+        """
+        if not bot.username:
+            return bot.get_ongoing_tasks(days, max_workers)
+
+        today = datetime.now()
+        dates = [(today - timedelta(days=n)).strftime('%Y-%m-%d') for n in range(days)]
+        closed = self.closed_days(bot.username, dates)
+        stale = [date for date in dates if date not in closed]
+
+        results = bot.map_concurrent(lambda date: self.sync_day(bot, date), stale, max_workers)
+
+        ongoing_tasks = []
+        seen = set()
+        failed_dates = []
+        for date, result in zip(stale, results):
+            if not result.get('success'):
+                failed_dates.append(date)
+                continue
+            for task in result['tasks']:
+                key = task_key(date, task)
+                if task.is_open and key not in seen:
+                    seen.add(key)
+                    ongoing_tasks.append(task)
+
+        return {
+            'success': len(failed_dates) < len(dates),
+            'tasks': ongoing_tasks,
+            'count': len(ongoing_tasks),
+            'checked_days': days,
+            'fetched_days': len(stale),
+            'failed_dates': failed_dates
+        }
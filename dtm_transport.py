@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+DTM Transport - pooled, retrying, timeout-bounded HTTP layer for DTMBot
+
+Every upstream origin (scheme + host) also gets one UpstreamGuard shared by
+all transports of the process: a token bucket and an in-flight cap keep us
+from hammering DTM, and a circuit breaker fails fast with UpstreamUnavailable
+while DTM is erroring or too slow, instead of piling up waiting threads.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(requests.ConnectionError):
+    """DTM was not contacted: the circuit breaker is open or the rate limiter is saturated"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool, timeout and retry settings for upstream DTM calls"""
+
+    pool_connections: int = 4          # Number of per-host pools kept alive
+    pool_maxsize: int = 16             # Sockets kept alive per host
+    connect_timeout: float = 5.0       # Seconds to establish a connection
+    read_timeout: float = 30.0         # Seconds to wait for response bytes
+    max_retries: int = 3               # Extra attempts for idempotent requests
+    backoff_factor: float = 0.5        # Sleep backoff_factor * 2**attempt between retries
+    backoff_max: float = 8.0           # Upper bound for a single backoff sleep
+    retry_statuses: Tuple[int, ...] = (502, 503, 504)
+    # Shared per upstream origin (the first transport to reach an origin sets them)
+    rate_limit: float = 20.0           # Requests per second (0 disables the token bucket)
+    rate_burst: int = 40               # Requests allowed back to back before throttling
+    max_in_flight: int = 32            # Concurrent requests (0 disables the cap)
+    acquire_timeout: float = 10.0      # Seconds to wait for a token/slot before failing fast
+    breaker_threshold: int = 5         # Consecutive failures that open the circuit
+    breaker_reset: float = 30.0        # Seconds the circuit stays open before a trial request
+    slow_call: float = 15.0            # Responses slower than this count as failures
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple as accepted by requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waits = 0
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, sleeping until one is available; False after timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+                if now + wait > deadline:
+                    return False
+                self.waits += 1
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after threshold consecutive failures; open -> half-open
+    after reset_timeout, when a single trial request decides between closed
+    and open again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a request may go upstream now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def cancel(self) -> None:
+        """Give back a trial request that was allowed but never sent"""
+        with self._lock:
+            self._trial_running = False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial request is allowed"""
+        with self._lock:
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logger.warning("DTM circuit opened after %d failure(s)", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class UpstreamGuard:
+    """Rate limit, in-flight cap and circuit breaker for one upstream origin"""
+
+    def __init__(self, origin: str, config: TransportConfig):
+        self.origin = origin
+        self.config = config
+        self.bucket = TokenBucket(config.rate_limit, config.rate_burst) if config.rate_limit > 0 else None
+        self.slots = threading.BoundedSemaphore(config.max_in_flight) if config.max_in_flight > 0 else None
+        self.breaker = CircuitBreaker(config.breaker_threshold, config.breaker_reset)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _reject(self, message: str, retry_after: float) -> UpstreamUnavailable:
+        with self._lock:
+            self.rejected += 1
+        return UpstreamUnavailable(message, retry_after)
+
+    def send(self, send_request, failure_statuses: Tuple[int, ...]) -> requests.Response:
+        """
+        Run send_request() if the breaker, rate limit and in-flight cap allow it
+
+        Raises:
+            UpstreamUnavailable: The request was not sent
+        """
+        if not self.breaker.allow():
+            raise self._reject(
+                f"DTM server is unavailable (circuit open), retry in {self.breaker.retry_after():.0f}s",
+                self.breaker.retry_after()
+            )
+
+        deadline = time.monotonic() + self.config.acquire_timeout
+        if self.bucket is not None and not self.bucket.acquire(self.config.acquire_timeout):
+            self.breaker.cancel()
+            raise self._reject("Too many requests to the DTM server, try again shortly", 1.0)
+        if self.slots is not None and not self.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self.breaker.cancel()
+            raise self._reject("Too many requests to the DTM server, try again shortly", 1.0)
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+
+        sent_at = time.monotonic()
+        try:
+            response = send_request()
+        except requests.RequestException:
+            self._failed()
+            raise
+        except BaseException:
+            # Not DTM's fault, but a half-open trial must never be left running
+            self.breaker.cancel()
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self.slots is not None:
+                self.slots.release()
+
+        if response.status_code in failure_statuses or time.monotonic() - sent_at > self.config.slow_call:
+            self._failed()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _failed(self) -> None:
+        with self._lock:
+            self.failures += 1
+        self.breaker.record_failure()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'origin': self.origin,
+                'circuit': self.breaker.state,
+                'circuit_trips': self.breaker.trips,
+                'consecutive_failures': self.breaker.failures,
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'throttled': self.bucket.waits if self.bucket is not None else 0
+            }
+
+
+_guards: Dict[str, UpstreamGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def guard_for(url: str, config: TransportConfig) -> UpstreamGuard:
+    """The process-wide guard of url's origin, created with config on first use"""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    with _guards_lock:
+        guard = _guards.get(origin)
+        if guard is None:
+            guard = _guards[origin] = UpstreamGuard(origin, config)
+        return guard
+
+
+def guard_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every upstream guard, keyed by origin"""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.origin: guard.stats() for guard in guards}
+
+
+class HTTPTransport:
+    """
+    Keep-alive HTTP session with a sized connection pool
+
+    Every request gets the configured (connect, read) timeout unless the caller
+    passes one. Requests flagged idempotent are retried with exponential backoff
+    on connection errors, timeouts and retry_statuses; everything else is sent
+    exactly once. Each attempt passes through the origin's UpstreamGuard.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None):
+        self.config = config or TransportConfig()
+        self.session = requests.Session()
+
+        # Retries are handled in request() so that only idempotent calls repeat
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            max_retries=0,
+            pool_block=False
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        """Seconds to sleep before retry number attempt (0-based)"""
+        return min(self.config.backoff_factor * (2 ** attempt), self.config.backoff_max)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        idempotent: bool = False,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the pooled session
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            idempotent: Retry on transient failures when True
+            **kwargs: Passed through to requests.Session.request
+
+        Raises:
+            UpstreamUnavailable: The guard refused to send the request
+        """
+        kwargs.setdefault('timeout', self.config.timeout)
+        attempts = 1 + (self.config.max_retries if idempotent else 0)
+        guard = guard_for(url, self.config)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = guard.send(
+                    lambda: self.session.request(method, url, **kwargs),
+                    self.config.retry_statuses
+                )
+            except UpstreamUnavailable:
+                # Not sent at all; retrying would only wait on the same guard
+                raise
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+            else:
+                if last_attempt or response.status_code not in self.config.retry_statuses:
+                    return response
+                # Release the socket back to the pool before sleeping
+                response.close()
+            time.sleep(self._backoff(attempt))
+
+        # Unreachable: the last attempt either returns or raises
+        raise RuntimeError("transport retry loop exited unexpectedly")
+
+    def get(self, url: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        """GET through the pooled session"""
+        return self.request('GET', url, idempotent=idempotent, **kwargs)
+
+    def post(self, url: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        """POST through the pooled session"""
+        return self.request('POST', url, idempotent=idempotent, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
@@ -0,0 +1,70 @@
+"""
+Gunicorn settings for the DTM web app
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every request spends most of its time waiting on the DTM server, so each
+worker serves many requests at once with green threads (gevent, used when
+installed) or threads (gthread). Every value can be overridden from the
+environment, which is how the systemd unit (dtmbot.service) tunes it.
+
+Each open /api/events stream holds a gthread thread for as long as the tab
+is open, so the app caps streams per worker (DTM_MAX_EVENT_STREAMS, by
+default half the threads) and answers 503 above it; green threads are cheap
+enough for a much higher cap.
+
+Keep DTM_WORKERS at 1 unless you know you need more: logged-in sessions are
+shared through the session store, but bulk-upload jobs and the /api/events
+stream live in the worker that started them.
+"""
+
+import importlib.util
+import os
+import sys
+
+bind = os.environ.get('DTM_BIND', '0.0.0.0:5000')
+
+worker_class = os.environ.get(
+    'DTM_WORKER_CLASS',
+    'gevent' if importlib.util.find_spec('gevent') is not None else 'gthread'
+)
+workers = int(os.environ.get('DTM_WORKERS', 1))
+# gthread: concurrent requests per worker (each open /api/events stream holds one)
+threads = int(os.environ.get('DTM_THREADS', 32))
+# gevent: concurrent green threads per worker
+worker_connections = int(os.environ.get('DTM_WORKER_CONNECTIONS', 1000))
+
+# Event streams allowed per worker, leaving the rest for ordinary requests
+# (read by the app, which each worker imports after this file is loaded)
+os.environ.setdefault(
+    'DTM_MAX_EVENT_STREAMS',
+    str(worker_connections // 2 if worker_class == 'gevent' else max(1, threads // 2))
+)
+
+# Seconds an idle browser keep-alive connection is held open
+keepalive = int(os.environ.get('DTM_KEEPALIVE', 5))
+# A worker silent for this long is restarted (bulk uploads run as jobs, not requests)
+timeout = int(os.environ.get('DTM_WORKER_TIMEOUT', 120))
+# On reload (SIGHUP) or stop, in-flight requests get this long to finish
+graceful_timeout = int(os.environ.get('DTM_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers after this many requests (0 = never), spread out by the jitter
+max_requests = int(os.environ.get('DTM_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('DTM_MAX_REQUESTS_JITTER', 50))
+
+# The app starts background threads (bot reaper, job workers) at import,
+# which would not survive a fork, so each worker imports it itself
+preload_app = False
+
+accesslog = os.environ.get('DTM_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('DTM_LOG_LEVEL', 'info')
+
+
+def worker_exit(server, worker):
+    """Close this worker's upstream connections on shutdown or reload"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.bots.shutdown()
+        app_module.jobs.shutdown()
+        app_module.journal.shutdown()
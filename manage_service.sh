@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # DTM Bot Service Management Script
-# Usage: ./manage_service.sh [start|stop|restart|status|logs|enable|disable]
+# Usage: ./manage_service.sh [start|stop|restart|reload|status|logs|enable|disable]
 
 SERVICE_NAME="dtmbot"
 
@@ -18,6 +18,10 @@ case "$1" in
         echo "Restarting DTM Bot service..."
         sudo systemctl restart $SERVICE_NAME
         ;;
+    reload)
+        echo "Reloading DTM Bot service (graceful worker restart)..."
+        sudo systemctl reload $SERVICE_NAME
+        ;;
     status)
         echo "DTM Bot service status:"
         sudo systemctl status $SERVICE_NAME --no-pager
@@ -36,12 +40,13 @@ case "$1" in
         ;;
     *)
         echo "DTM Bot Service Manager"
-        echo "Usage: $0 {start|stop|restart|status|logs|enable|disable}"
+        echo "Usage: $0 {start|stop|restart|reload|status|logs|enable|disable}"
         echo ""
         echo "Commands:"
         echo "  start   - Start the service"
         echo "  stop    - Stop the service"
         echo "  restart - Restart the service"
+        echo "  reload  - Reload code without dropping in-flight requests"
         echo "  status  - Show service status"
         echo "  logs    - Show recent service logs"
         echo "  enable  - Enable auto-start on boot"
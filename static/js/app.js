@@ -47,6 +47,15 @@ document.addEventListener('DOMContentLoaded', () => {
 // Session monitoring
 let sessionCheckInterval = null;
 
+// Server-Sent Events stream (/api/events)
+let eventSource = null;
+const jobUpdateWaiters = new Map();
+
+// Task actions are queued server-side and sent to DTM in the background
+const ACTION_DONE_LABELS = { start: 'started', pause: 'paused', resume: 'resumed', end: 'ended' };
+const ACTION_POLL_INTERVAL = 2000;
+const actionRetryNotified = new Set();
+
 function initializeApp() {
     // Check if already logged in
     checkLoginStatus();
@@ -65,6 +74,7 @@ function initializeApp() {
     document.getElementById('btnCalendarView').addEventListener('click', showCalendarView);
     document.getElementById('btnOngoingView').addEventListener('click', showOngoingView);
     document.getElementById('btnRefreshOngoing').addEventListener('click', loadOngoingTasks);
+    document.getElementById('btnEndAllOngoing').addEventListener('click', endAllOngoingTasks);
 
     // Setup dynamic form changes
     document.getElementById('taskType').addEventListener('change', handleTaskTypeChange);
@@ -105,6 +115,10 @@ function startSessionMonitoring() {
         clearInterval(sessionCheckInterval);
     }
     sessionCheckInterval = setInterval(async () => {
+        // The event stream pushes session expiry, so only poll without it
+        if (isEventStreamOpen()) {
+            return;
+        }
         if (document.getElementById('appScreen').classList.contains('active')) {
             const result = await apiCall('status');
             if (!result || !result.logged_in) {
@@ -123,6 +137,100 @@ function stopSessionMonitoring() {
     }
 }
 
+// Server-Sent Events
+function isEventStreamOpen() {
+    return eventSource !== null && eventSource.readyState === EventSource.OPEN;
+}
+
+function startEventStream() {
+    if (!window.EventSource) {
+        return;
+    }
+    stopEventStream();
+    
+    eventSource = new EventSource('/api/events');
+    
+    eventSource.addEventListener('session-expired', () => {
+        showToast('Session expired', 'Your session has expired. Please login again.', 'error');
+        showLoginScreen();
+    });
+    
+    eventSource.addEventListener('task', () => {
+        // A task changed (possibly from another tab); refresh what is on screen
+        refreshTaskViews();
+    });
+    
+    eventSource.addEventListener('action', (e) => {
+        notifyActionUpdate(JSON.parse(e.data));
+    });
+    
+    eventSource.addEventListener('job-progress', (e) => {
+        const job = JSON.parse(e.data);
+        const waiter = jobUpdateWaiters.get(job.job_id);
+        if (waiter) {
+            waiter(job);
+        }
+    });
+}
+
+function stopEventStream() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
+function refreshTaskViews() {
+    if (document.getElementById('ongoingView').classList.contains('active')) {
+        loadOngoingTasks();
+    } else {
+        loadTasks(selectedDate);
+        refreshCalendarEvents();
+    }
+}
+
+function notifyActionUpdate(action) {
+    if (action.status === 'done') {
+        showToast('Success!', `Task ${ACTION_DONE_LABELS[action.kind]} successfully`, 'success');
+    } else if (action.status === 'failed') {
+        showToast('Error', `Could not ${action.kind} task: ${action.error || 'DTM rejected it'}`, 'error');
+    } else if (action.error && !actionRetryNotified.has(action.action_id)) {
+        actionRetryNotified.add(action.action_id);
+        showToast('Saved', 'DTM is not responding; the change will be sent automatically', 'warning');
+    }
+}
+
+async function watchQueuedAction(action) {
+    // Outcomes are pushed over the event stream; poll only without one
+    if (isEventStreamOpen()) {
+        return;
+    }
+    let current = action;
+    while (current && (current.status === 'queued' || current.status === 'running')) {
+        await new Promise(resolve => setTimeout(resolve, ACTION_POLL_INTERVAL));
+        current = await apiCall(`actions/${action.action_id}`);
+    }
+    if (current) {
+        notifyActionUpdate(current);
+        refreshTaskViews();
+    }
+}
+
+function nextJobUpdate(jobId, timeoutMs) {
+    // Resolves with the next pushed job update, or null after timeoutMs
+    return new Promise(resolve => {
+        const timer = setTimeout(() => {
+            jobUpdateWaiters.delete(jobId);
+            resolve(null);
+        }, timeoutMs);
+        jobUpdateWaiters.set(jobId, job => {
+            clearTimeout(timer);
+            jobUpdateWaiters.delete(jobId);
+            resolve(job);
+        });
+    });
+}
+
 // API Functions
 async function apiCall(endpoint, method = 'GET', data = null) {
     const options = {
@@ -223,6 +331,7 @@ function showLoginScreen() {
     // Clear email display
     document.getElementById('userEmail').textContent = '';
     stopSessionMonitoring();
+    stopEventStream();
 }
 
 function showAppScreen() {
@@ -241,16 +350,14 @@ function showAppScreen() {
     // Initialize date picker
     initializeDatePicker();
 
-    // Load initial data
-    loadInitialData();
-
-    // Load today's tasks and set as selected date
+    // Load form data and today's tasks in one request
     const today = new Date().toISOString().split('T')[0];
     selectedDate = today;
-    loadTasks();
+    loadInitialData(today);
 
-    // Start session monitoring
+    // Start session monitoring and live updates
     startSessionMonitoring();
+    startEventStream();
 }
 
 function initializeDatePicker() {
@@ -278,7 +385,9 @@ function initializeCalendar() {
             center: 'title',
             right: 'dayGridMonth,timeGridWeek,timeGridDay'
         },
-        events: [],
+        // One /api/calendar request per visible range (see loadCalendarEvents)
+        events: loadCalendarEvents,
+        dayMaxEvents: 3,
         eventClick: function(info) {
             handleEventClick(info.event);
         },
@@ -305,11 +414,7 @@ function initializeCalendar() {
             plusIcon.className = 'fas fa-plus calendar-plus-icon';
             plusIcon.title = 'View tasks for this day';
 
-            // Format date as YYYY-MM-DD using local timezone to avoid date shifts
-            const year = info.date.getFullYear();
-            const month = String(info.date.getMonth() + 1).padStart(2, '0');
-            const day = String(info.date.getDate()).padStart(2, '0');
-            const dateStr = `${year}-${month}-${day}`;
+            const dateStr = toDateString(info.date);
             
             plusIcon.setAttribute('data-date', dateStr);
 
@@ -339,36 +444,83 @@ function updateSelectedDate(dateStr) {
 }
 
 function handleEventClick(event) {
-    // Show task details or options to end/pause
-    if (event.extendedProps && event.extendedProps.taskId) {
-        const taskId = event.extendedProps.taskId;
-        openEndTaskModal(taskId, {
-            title: event.title,
-            description: event.extendedProps.description,
-            project: event.extendedProps.project
-        });
+    // Offer to end tasks that are still open; day totals and finished tasks have no action
+    const props = event.extendedProps || {};
+    if (props.taskId && (props.status === 'ongoing' || props.status === 'paused')) {
+        openEndTaskModal(props.taskId, props.day);
     }
 }
 
+function toDateString(date) {
+    // Format as YYYY-MM-DD using local timezone to avoid date shifts
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    return `${year}-${month}-${day}`;
+}
+
+async function loadCalendarEvents(info, successCallback, failureCallback) {
+    // FullCalendar's range end is exclusive; /api/calendar's "to" is inclusive
+    const lastDay = new Date(info.end);
+    lastDay.setDate(lastDay.getDate() - 1);
+    
+    const result = await apiCall(`calendar?from=${toDateString(info.start)}&to=${toDateString(lastDay)}`);
+    if (!result || !result.success) {
+        failureCallback(new Error(result?.message || 'Failed to load calendar'));
+        return;
+    }
+    
+    // One all-day summary per day that has tasks, followed by the task events
+    const summaries = Object.entries(result.days)
+        .filter(([, day]) => day.count > 0)
+        .map(([date, day]) => ({
+            start: date,
+            allDay: true,
+            title: `${day.count} ${day.count === 1 ? 'task' : 'tasks'} · ${day.total_hours}`,
+            classNames: ['calendar-day-total'],
+            display: 'block'
+        }));
+    successCallback(summaries.concat(result.events));
+}
+
 // Data Loading
-async function loadInitialData() {
+async function apiBatch(ops) {
+    // Several read-only calls in one request; resolves to {id: result} (empty on failure)
+    const result = await apiCall('batch', 'POST', { ops });
+    return (result && result.success) ? result.results : {};
+}
+
+async function loadInitialData(date) {
     showLoading(true);
     
-    // Load task types
-    const taskTypesResult = await apiCall('task-types');
+    const results = await apiBatch([
+        { op: 'task-types' },
+        { op: 'projects' },
+        { op: 'tasks', date: date || document.getElementById('taskDate').value }
+    ]);
+    
+    showLoading(false);
+    
+    const taskTypesResult = results['task-types'];
     if (taskTypesResult && taskTypesResult.success) {
         taskTypes = taskTypesResult.data;
         populateTaskTypes();
     }
     
-    // Load projects
-    const projectsResult = await apiCall('projects');
+    const projectsResult = results.projects;
     if (projectsResult && projectsResult.success) {
         projects = projectsResult.data;
         populateProjects();
     }
     
-    showLoading(false);
+    const tasksResult = results.tasks;
+    if (tasksResult && tasksResult.success) {
+        displayTasks(tasksResult);
+        updateStats(tasksResult);
+    } else {
+        console.error('Failed to load tasks:', tasksResult);
+        displayEmptyState();
+    }
 }
 
 async function loadTasks(date) {
@@ -397,102 +549,70 @@ function displayTasks(result) {
     
     console.log('Display tasks result:', result);
     
-    // Check if we have tasks
-    if (!result || !result.raw_response || !result.raw_response.data) {
+    // The server already drops the "No Records" placeholder row
+    if (!result || !result.tasks || result.tasks.length === 0) {
         displayEmptyState();
         return;
     }
     
-    const rawData = result.raw_response;
+    result.tasks.forEach(row => {
+        addTaskCard(taskFromRow(row));
+    });
+}
+
+// Statuses the server reports, mapped to the card CSS classes
+const STATUS_CLASSES = {
+    ongoing: 'running',
+    paused: 'paused',
+    completed: 'completed'
+};
+
+function taskFromRow(row) {
+    // row is a compact task from /api/tasks: start/end are ISO datetimes,
+    // duration is in seconds and status is one of ongoing/paused/completed/unknown
+    const task = {
+        index: row.index,  // The display number
+        taskId: row.task_id || row.index,  // The real UUID task ID
+        category: row.category,
+        activity: row.activity || 'N/A',  // Sometimes empty
+        taskType: row.task_type,
+        task: row.description,
+        startTime: formatTaskDateTime(row.start),
+        startDate: row.start ? row.start.slice(0, 10) : null, // YYYY-MM-DD
+        endTime: formatTaskDateTime(row.end),
+        duration: formatDuration(row.duration_seconds),
+        status: row.status_text,
+        statusClass: STATUS_CLASSES[row.status] || 'completed'
+    };
     
-    // Check if there are actual tasks (not just "No Records")
-    if (rawData.recordsTotal === 0 || 
-        (rawData.data.length === 1 && rawData.data[0][0] === "No Records")) {
-        displayEmptyState();
-        return;
+    // Store task data for later use with BOTH index and taskId as keys
+    if (task.index) {
+        taskDataMap.set(String(task.index), task);
+    }
+    if (task.taskId) {
+        taskDataMap.set(task.taskId, task);
     }
     
-    // Process tasks from raw response
-    rawData.data.forEach((taskRow, index) => {
-        const task = parseTaskRow(taskRow);
-        if (task && task.index !== "No Records") {
-            addTaskCard(task);
-        }
-    });
+    return task;
 }
 
-function parseTaskRow(row) {
-    // The API returns HTML in the cells, we need to extract the text
-    // row is an array: [#, Category/Project, Activity, TaskType, Task, StartTime, EndTime, Duration, Status, Actions]
-    try {
-        // row[0] is the number, rest are strings with HTML
-        const startTime = extractText(row[5]);
-        
-        // Extract start date from startTime (format: "YY-MM-DD HH:MM:SS" or "25-11-03 10:00:00")
-        let startDate = null;
-        if (startTime) {
-            const dateMatch = startTime.match(/(\d{2}-\d{2}-\d{2})/);
-            if (dateMatch) {
-                startDate = dateMatch[1]; // Keep in YY-MM-DD format for now
-            }
-        }
-        
-        // Extract real task ID (UUID) from actions HTML
-        // Actions HTML contains links like: href='task/updatetask/1/d8286acf-7fdc-415b-ad43-fb4cc0c5b925'
-        let taskId = row[0]; // Default to index
-        if (row[9]) {
-            const uuidMatch = row[9].match(/task\/updatetask\/\d+\/([a-f0-9\-]{36})/i);
-            if (uuidMatch) {
-                taskId = uuidMatch[1];
-                console.log(`Extracted task UUID: ${taskId} for task index ${row[0]}`);
-            } else {
-                console.log(`No UUID found for task index ${row[0]}, using index as taskId`);
-            }
-        }
-        
-        const task = {
-            index: row[0],  // The display number
-            taskId: taskId,  // The real UUID task ID
-            category: extractText(row[1]),
-            activity: row[2] || 'N/A',  // Sometimes empty
-            taskType: row[3],
-            task: row[4],
-            startTime: startTime,
-            startDate: startDate, // Add start date
-            endTime: extractText(row[6]),
-            duration: row[7],
-            status: extractText(row[8]),
-            actions: row[9]
-        };
-        
-        // Store task data for later use with BOTH index and taskId as keys
-        if (task.index) {
-            taskDataMap.set(String(task.index), task);
-        }
-        if (task.taskId) {
-            taskDataMap.set(task.taskId, task);
-        }
-        
-        return task;
-    } catch (e) {
-        console.error('Error parsing task row:', e, row);
-        return null;
-    }
+function formatTaskDateTime(isoString) {
+    // "2025-11-03T10:00:00" -> "2025-11-03 10:00:00"
+    return isoString ? isoString.replace('T', ' ') : '';
 }
 
-function extractText(html) {
-    if (!html) return '';
-    const tmp = document.createElement('div');
-    tmp.innerHTML = html;
-    return tmp.textContent || tmp.innerText || '';
+function formatDuration(seconds) {
+    if (seconds === null || seconds === undefined) return '';
+    const pad = n => String(n).padStart(2, '0');
+    const hours = Math.floor(seconds / 3600);
+    const minutes = Math.floor((seconds % 3600) / 60);
+    return `${pad(hours)}:${pad(minutes)}:${pad(seconds % 60)}`;
 }
 
 function addTaskCard(task) {
     const taskList = document.getElementById('taskList');
     
-    const statusLower = task.status.toLowerCase();
-    const statusClass = statusLower.includes('on going') ? 'running' : 
-                       (statusLower.includes('pause') || statusLower.includes('on hold') || statusLower.includes('hold')) ? 'paused' : 'completed';
+    const statusClass = task.statusClass;
     
     const taskCard = document.createElement('div');
     taskCard.className = 'task-card';
@@ -560,28 +680,22 @@ function displayEmptyState() {
 }
 
 function updateStats(result) {
-    if (!result || !result.raw_response) {
+    if (!result || !result.success) {
         return;
     }
     
-    const rawData = result.raw_response;
-    
     // Update task count
-    const taskCount = rawData.recordsTotal || 0;
+    const taskCount = result.total_records || 0;
     document.getElementById('taskCount').textContent = `${taskCount} ${taskCount === 1 ? 'task' : 'tasks'}`;
     document.getElementById('completedCount').textContent = taskCount;
     
     // Update total hours
-    const totalHours = rawData.totalHr || '00:00:00';
+    const totalHours = result.total_hours || '00:00:00';
     document.getElementById('totalHours').textContent = totalHours;
     
-    // Update current status
-    const statusHtml = rawData.taskStatus || 'No active task';
+    // Update current status (already plain text)
     const statusDiv = document.getElementById('currentStatus');
-    
-    // Extract just the text from HTML
-    const statusText = extractText(statusHtml);
-    statusDiv.textContent = statusText || 'No active task';
+    statusDiv.textContent = result.task_status || 'No active task';
 }
 
 function populateTaskTypes() {
@@ -695,15 +809,24 @@ async function populateFormWithLastValues() {
 
     if (lastValues.project) {
         document.getElementById('project').value = lastValues.project;
-        // Load categories for this project
-        if (lastValues.project) {
-            await loadCategories(lastValues.project);
+
+        // Categories and activities of the last task in one request
+        const ops = [{ op: 'categories', project_id: lastValues.project }];
+        if (lastValues.category) {
+            ops.push({ op: 'activities', project_id: lastValues.project, category_id: lastValues.category });
+        }
+        const results = await apiBatch(ops);
+
+        if (results.categories && results.categories.success) {
+            categories = results.categories.data;
+            populateCategories();
 
             if (lastValues.category) {
                 document.getElementById('category').value = lastValues.category;
-                // Load activities for this project and category
-                if (lastValues.category) {
-                    await loadActivities(lastValues.project, lastValues.category);
+
+                if (results.activities && results.activities.success) {
+                    activities = results.activities.data;
+                    populateActivities();
 
                     if (lastValues.activity) {
                         document.getElementById('activity').value = lastValues.activity;
@@ -869,41 +992,19 @@ async function handleStartTask(e) {
     showLoading(false);
     
     if (result && result.success) {
-        showToast('Success!', 'Task started successfully', 'success');
+        // Queued: the task appears once DTM has it (pushed as a 'task' event)
+        showToast('Saved', 'Starting the task in DTM...', 'success');
 
         // Save the form values for next time
         saveLastTaskValues(formData);
 
         closeStartTaskModal();
 
-        // Add to calendar
-        const taskType = taskTypes.find(t => t.id === formData.task_type_id);
-        const project = projects.find(p => p.id === formData.project_id);
-
-        // Use the actual start date from the form
-        const eventDate = new Date(startDate);
-
-        calendar.addEvent({
-            title: `${taskType?.name || 'Task'} - ${project?.name || 'Project'}`,
-            start: eventDate,
-            allDay: true,
-            backgroundColor: '#6366f1',
-            extendedProps: {
-                description: formData.description,
-                project: project?.name,
-                taskId: 'current-task' // In a real app, get this from the API response
-            }
-        });
-
-        // Refresh calendar to ensure proper display
-        calendar.render();
-
-        // Reload tasks to show the newly started task
-        loadTasks();
-
         // Switch to Ongoing Tasks view
         showOngoingView();
 
+        watchQueuedAction(result);
+
     } else {
         showToast('Error', result?.message || 'Failed to start task', 'error');
     }
@@ -938,15 +1039,9 @@ async function confirmEndTask() {
     showLoading(false);
     
     if (result && result.success) {
-        showToast('Success!', 'Task ended successfully', 'success');
+        showToast('Saved', 'Ending the task in DTM...', 'success');
         closeEndTaskModal();
-        
-        // Remove from calendar and update list
-        const events = calendar.getEvents();
-        const event = events.find(e => e.extendedProps.taskId === currentTaskId);
-        if (event) {
-            event.remove();
-        }
+        watchQueuedAction(result);
     } else {
         showToast('Error', result?.message || 'Failed to end task', 'error');
     }
@@ -1097,61 +1192,8 @@ function showCalendarView() {
 }
 
 function refreshCalendarEvents() {
-    // Clear existing events
-    calendar.removeAllEvents();
-
-    // Load ongoing tasks and add them as calendar events
-    loadOngoingTasksForCalendar();
-}
-
-async function loadOngoingTasksForCalendar() {
-    const result = await apiCall('tasks/ongoing');
-
-    if (result && result.success && result.tasks) {
-        result.tasks.forEach(taskRow => {
-            // Parse task data from the raw response format
-            // taskRow is in format: [id, description, activity, taskType, task, startTime, endTime, duration, status, actions]
-            if (taskRow.length >= 6) {
-                const taskId = taskRow[0];
-                const description = taskRow[4] || 'Task';
-                const startTime = taskRow[5] || '';
-
-                // Extract date from startTime (format: "YY-MM-DD HH:MM:SS")
-                let eventDate = new Date();
-                if (startTime) {
-                    const dateMatch = startTime.match(/(\d{2}-\d{2}-\d{2})/);
-                    if (dateMatch) {
-                        const dateStr = dateMatch[1];
-                        // dateStr is in YY-MM-DD format
-                        const parts = dateStr.split('-');
-                        const year = parts[0];
-                        const month = parts[1];
-                        const day = parts[2];
-                        const fullYear = year.length === 2 ? '20' + year : year;
-                        eventDate = new Date(`${fullYear}-${month}-${day}`);
-                    }
-                }
-
-                // Only add if it's an ongoing task
-                const status = taskRow[8] || '';
-                if (status.includes('On Going') || status.includes('Pause') || status.includes('On Hold')) {
-                    calendar.addEvent({
-                        title: description,
-                        start: eventDate,
-                        allDay: true,
-                        backgroundColor: (status.includes('Pause') || status.includes('On Hold')) ? '#f59e0b' : '#6366f1',
-                        extendedProps: {
-                            taskId: taskId,
-                            status: status
-                        }
-                    });
-                }
-            }
-        });
-
-        // Refresh calendar display
-        calendar.render();
-    }
+    // Reload the visible range from /api/calendar
+    calendar.refetchEvents();
 }
 
 function showOngoingView() {
@@ -1169,6 +1211,9 @@ function showOngoingView() {
 }
 
 // Ongoing Tasks Functions
+// IDs of the running and paused tasks shown, for "End All"
+let openTaskIds = [];
+
 async function loadOngoingTasks() {
     showLoading(true);
     
@@ -1187,6 +1232,7 @@ async function loadOngoingTasks() {
 function displayOngoingTasks(result) {
     const tasksList = document.getElementById('ongoingTasksList');
     tasksList.innerHTML = '';
+    openTaskIds = [];
     
     console.log('Display ongoing tasks result:', result);
     
@@ -1197,20 +1243,44 @@ function displayOngoingTasks(result) {
     }
     
     // Process tasks
-    result.tasks.forEach((taskRow, index) => {
-        const task = parseTaskRow(taskRow);
-        if (task && task.index !== "No Records") {
-            addOngoingTaskCard(task);
+    result.tasks.forEach(row => {
+        const task = taskFromRow(row);
+        if (task.statusClass === 'running' || task.statusClass === 'paused') {
+            openTaskIds.push(task.taskId);
         }
+        addOngoingTaskCard(task);
     });
+    document.getElementById('btnEndAllOngoing').disabled = openTaskIds.length === 0;
+}
+
+async function endAllOngoingTasks() {
+    if (openTaskIds.length === 0) return;
+    const count = openTaskIds.length;
+    if (!confirm(`End all ${count} open ${count === 1 ? 'task' : 'tasks'} now?`)) return;
+
+    showLoading(true);
+    const result = await apiCall('tasks/bulk-action', 'POST', { action: 'end', task_ids: openTaskIds });
+    showLoading(false);
+
+    if (!result || !result.results) {
+        showToast('Error', (result && result.message) || 'Failed to end tasks', 'error');
+        return;
+    }
+    if (result.failed === 0 && result.queued === 0) {
+        showToast('Success!', `${result.succeeded} ${result.succeeded === 1 ? 'task' : 'tasks'} ended`, 'success');
+    } else if (result.failed === 0) {
+        showToast('Saved', `${result.succeeded} ended, ${result.queued} will be sent automatically`, 'warning');
+    } else {
+        const failed = result.results.filter(item => !item.success && !item.queued);
+        showToast('Error', `${result.failed} of ${result.results.length} could not be ended: ${failed[0].message || 'DTM rejected it'}`, 'error');
+    }
+    refreshTaskViews();
 }
 
 function addOngoingTaskCard(task) {
     const tasksList = document.getElementById('ongoingTasksList');
     
-    const statusLower = task.status.toLowerCase();
-    const statusClass = statusLower.includes('on going') ? 'running' : 
-                       (statusLower.includes('pause') || statusLower.includes('on hold') || statusLower.includes('hold')) ? 'paused' : 'completed';
+    const statusClass = task.statusClass;
     
     const taskCard = document.createElement('div');
     taskCard.className = 'ongoing-task-card';
@@ -1268,6 +1338,8 @@ function addOngoingTaskCard(task) {
 }
 
 function displayEmptyOngoingState() {
+    openTaskIds = [];
+    document.getElementById('btnEndAllOngoing').disabled = true;
     const tasksList = document.getElementById('ongoingTasksList');
     tasksList.innerHTML = `
         <div class="empty-state">
@@ -1361,11 +1433,9 @@ async function handlePauseTaskSubmit(e) {
     closePauseTaskModal();
 
     if (result && result.success) {
-        showToast('Success!', 'Task paused successfully', 'success');
-        // Refresh ongoing tasks, calendar, and sidebar
-        loadOngoingTasks();
-        refreshCalendarEvents();
-        loadTasks();
+        // Views refresh when DTM has accepted the pause
+        showToast('Saved', 'Pausing the task in DTM...', 'success');
+        watchQueuedAction(result);
     } else {
         showToast('Error', result?.message || 'Failed to pause task', 'error');
     }
@@ -1449,11 +1519,9 @@ async function handleResumeTaskSubmit(e) {
     closeResumeTaskModal();
 
     if (result && result.success) {
-        showToast('Success!', 'Task resumed successfully', 'success');
-        // Refresh ongoing tasks, calendar, and sidebar
-        loadOngoingTasks();
-        refreshCalendarEvents();
-        loadTasks();
+        // Views refresh when DTM has accepted the resume
+        showToast('Saved', 'Resuming the task in DTM...', 'success');
+        watchQueuedAction(result);
     } else {
         showToast('Error', result?.message || 'Failed to resume task', 'error');
     }
@@ -1540,12 +1608,9 @@ async function handleEndTaskSubmit(e) {
     showLoading(false);
     
     if (result && result.success) {
-        showToast('Success!', 'Task ended successfully', 'success');
-        
-        // Refresh ongoing tasks, calendar, and sidebar
-        loadOngoingTasks();
-        refreshCalendarEvents();
-        loadTasks();
+        // Views refresh when DTM has accepted the end
+        showToast('Saved', 'Ending the task in DTM...', 'success');
+        watchQueuedAction(result);
     } else {
         showToast('Error', result?.message || 'Failed to end task', 'error');
     }
@@ -2055,12 +2120,13 @@ async function handleBulkUpload(event) {
                 throw new Error(result.message || 'Upload failed');
             }
         } else {
-            // Success
-            showUploadResults(result);
-            showToast('Success', `Uploaded ${result.stats.success} tasks successfully`, 'success');
+            // Rows are processed in a background job; follow its progress
+            const finalResult = await waitForBulkUploadJob(result.job_id, result.stats.total);
+            showUploadResults(finalResult);
+            showToast('Success', `Uploaded ${finalResult.stats.success} tasks successfully`, 'success');
             
             // Refresh calendar if tasks were added
-            if (result.stats.success > 0) {
+            if (finalResult.stats.success > 0) {
                 setTimeout(() => {
                     loadTasksForDate(selectedDate);
                     calendar.refetchEvents();
@@ -2077,6 +2143,46 @@ async function handleBulkUpload(event) {
     }
 }
 
+const JOB_POLL_INTERVAL = 1500;
+const JOB_EVENT_TIMEOUT = 10000;
+
+function updateBulkUploadProgress(stats) {
+    const total = stats.total || 0;
+    const percent = total ? Math.round((stats.processed / total) * 100) : 100;
+    
+    document.getElementById('progressMessage').textContent = 'Uploading tasks...';
+    document.getElementById('progressCount').textContent = `${stats.processed} / ${total}`;
+    document.getElementById('progressBarFill').style.width = `${Math.max(10, percent)}%`;
+}
+
+async function waitForBulkUploadJob(jobId, total) {
+    updateBulkUploadProgress({ processed: 0, total });
+    
+    // Progress is pushed over the event stream; poll the job status only
+    // without a stream or when no update has arrived for a while
+    let job = await apiCall(`jobs/${jobId}`);
+    while (job && !job.done) {
+        updateBulkUploadProgress(job.stats);
+        const timeout = isEventStreamOpen() ? JOB_EVENT_TIMEOUT : JOB_POLL_INTERVAL;
+        job = await nextJobUpdate(jobId, timeout) || await apiCall(`jobs/${jobId}`);
+    }
+    
+    if (!job) {
+        throw new Error('Lost track of the upload job');
+    }
+    updateBulkUploadProgress(job.stats);
+    
+    const results = await apiCall(`jobs/${jobId}/results`);
+    if (job.status === 'failed') {
+        throw new Error(job.error || 'Upload job failed');
+    }
+    
+    return {
+        stats: job.stats,
+        results: results ? results.results : []
+    };
+}
+
 function showValidationErrors(result) {
     const progressDiv = document.getElementById('uploadProgress');
     const resultsDiv = document.getElementById('uploadResults');
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Unit tests for web app endpoints with throwaway stores (no DTM server needed)
+
+    python -m pytest -q test_app.py
+"""
+
+import os
+import time
+import unittest
+
+import requests
+
+# Everything the app opens at import stays in memory, and nothing replays in the background
+for name, value in (
+    ('DTM_ACTION_JOURNAL', ':memory:'),
+    ('DTM_SESSION_STORE', ':memory:'),
+    ('DTM_TASK_STORE', ':memory:'),
+    ('DTM_SECRET_KEY', 'test'),
+    ('DTM_REPLAY_WORKERS', '0'),
+    ('DTM_LOG_LEVEL', 'error')
+):
+    os.environ.setdefault(name, value)
+
+import app  # noqa: E402
+from dtm_journal import ACTION_QUEUED  # noqa: E402
+from dtm_transport import CircuitBreaker, guard_for  # noqa: E402
+
+
+class BulkActionTest(unittest.TestCase):
+    """Bulk changes DTM could not take (open circuit, 5xx) are queued; refusals fail"""
+
+    SESSION_ID = 'bulk-test-session'
+
+    def setUp(self):
+        self.bot = app.new_bot()
+        self.bot.base_url = 'https://dtm-circuit-open.example'
+        self.bot.username = 'user'
+        self.bot._mark_session_valid()
+        app.bots.put(self.SESSION_ID, self.bot)
+
+        self.breaker = guard_for(self.bot.base_url, self.bot.transport.config).breaker
+        self.breaker.state = CircuitBreaker.OPEN
+        self.breaker.opened_at = time.monotonic()
+
+        self.client = app.app.test_client()
+        with self.client.session_transaction() as web_session:
+            web_session['session_id'] = self.SESSION_ID
+
+    def tearDown(self):
+        self.breaker.record_success()
+        for action in app.journal.pending(self.SESSION_ID):
+            app.journal.fail(action['id'], 'test over')
+        app.bots.remove(self.SESSION_ID)
+
+    def test_circuit_open_queues_every_task(self):
+        response = self.client.post('/api/tasks/bulk-action', json={
+            'action': 'end',
+            'task_ids': ['t1', 't2'],
+            'datetime': '2025-11-13 06:00 PM'
+        })
+        body = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((body['succeeded'], body['failed'], body['queued']), (0, 0, 2))
+        self.assertTrue(body['success'])
+        for result in body['results']:
+            self.assertTrue(result['queued'])
+            self.assertNotIn('retryable', result)
+
+        pending = app.journal.pending(self.SESSION_ID)
+        self.assertEqual([(a['task_id'], a['status']) for a in pending], [('t1', ACTION_QUEUED), ('t2', ACTION_QUEUED)])
+        self.assertEqual(pending[0]['payload'], {'when': '2025-11-13 06:00 PM'})
+
+    def test_server_errors_are_queued_and_refusals_fail(self):
+        self.breaker.record_success()
+
+        def request(method, path, **kwargs):
+            response = requests.Response()
+            response.url = self.bot.base_url + path
+            if '/t-down/' in path:
+                response.status_code, response._content = 502, b'bad gateway'
+            elif '/t-gone/' in path:
+                response.status_code, response._content = 200, b'{"success":false,"message":"Task not found"}'
+            else:
+                response.status_code, response._content = 200, b'{"success":true}'
+            return response
+        self.bot._request = request
+
+        body = self.client.post('/api/tasks/bulk-action', json={
+            'action': 'pause',
+            'task_ids': ['t-ok', 't-down', 't-gone']
+        }).get_json()
+
+        self.assertEqual((body['succeeded'], body['failed'], body['queued']), (1, 1, 1))
+        self.assertFalse(body['success'])
+        results = {result['task_id']: result for result in body['results']}
+        self.assertTrue(results['t-down']['queued'])
+        self.assertEqual(results['t-gone']['message'], 'Task not found')
+        self.assertTrue(all('retryable' not in result for result in body['results']))
+        self.assertEqual([a['task_id'] for a in app.journal.pending(self.SESSION_ID)], ['t-down'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for DTMBot task status changes against a stubbed transport (no DTM server needed)
+
+    python -m pytest -q test_bot.py
+"""
+
+import unittest
+
+import requests
+
+from dtm_bot import DTMBot, SESSION_EXPIRED, SESSION_UNKNOWN, SESSION_VALID
+from dtm_transport import UpstreamUnavailable
+
+
+def json_response(status_code: int, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = 'https://dtm.example/task/updatetask'
+    response._content = body
+    return response
+
+
+class UpdateTaskStatusTest(unittest.TestCase):
+    """update_task_status tells refusals, retryable failures and an unreachable DTM apart"""
+
+    def setUp(self):
+        self.bot = DTMBot(base_url='https://dtm.example')
+        self.bot.username = 'user'
+
+    def stub(self, outcome):
+        def request(method, path, **kwargs):
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+        self.bot._request = request
+
+    def test_upstream_unavailable_is_raised(self):
+        self.stub(UpstreamUnavailable('circuit open', 12))
+        with self.assertRaises(UpstreamUnavailable):
+            self.bot.update_task_status('t1', 'end', '2025-11-13 05:00 PM')
+
+    def test_network_error_is_retryable(self):
+        self.stub(requests.ConnectionError('refused'))
+        outcome = self.bot.update_task_status('t1', 'end', '2025-11-13 05:00 PM')
+        self.assertFalse(outcome['success'])
+        self.assertTrue(outcome['retryable'])
+
+    def test_server_error_is_retryable(self):
+        self.stub(json_response(502, b'bad gateway'))
+        self.assertTrue(self.bot.update_task_status('t1', 'pause')['retryable'])
+
+    def test_refusal_is_final_and_keeps_message(self):
+        self.stub(json_response(200, b'{"success":false,"message":"Task not found"}'))
+        outcome = self.bot.update_task_status('t1', 'resume')
+        self.assertEqual(outcome['message'], 'Task not found')
+        self.assertFalse(outcome['retryable'])
+
+    def test_success(self):
+        self.stub(json_response(200, b'{"success":true}'))
+        self.assertTrue(self.bot.update_task_status('t1', 'end')['success'])
+
+    def test_update_tasks_reports_unavailable_per_task(self):
+        self.stub(UpstreamUnavailable('circuit open', 12))
+        results = self.bot.update_tasks(['t1', 't2'], 'end', '2025-11-13 05:00 PM')
+        self.assertEqual([r['task_id'] for r in results], ['t1', 't2'])
+        self.assertTrue(all(r['retryable'] and not r['success'] for r in results))
+
+
+class CheckSessionTest(unittest.TestCase):
+    """Only a login page counts as an expired session; outages are unknown"""
+
+    def setUp(self):
+        self.bot = DTMBot(base_url='https://dtm.example', session_check_ttl=60)
+        self.bot.username = 'user'
+
+    def stub(self, status_code, body=b'', url='https://dtm.example/home'):
+        def request(method, path, **kwargs):
+            response = json_response(status_code, body)
+            response.url = url
+            return response
+        self.bot._request = request
+
+    def test_home_page_is_valid_and_cached(self):
+        self.stub(200, b'<a href="/logout">Logout</a>')
+        self.assertEqual(self.bot.check_session(), SESSION_VALID)
+        self.stub(502)
+        self.assertEqual(self.bot.check_session(), SESSION_VALID)
+
+    def test_login_page_expires_cached_result(self):
+        self.stub(200, b'<a href="/logout">Logout</a>')
+        self.bot.check_session()
+        self.stub(200, b'<form>login <input name="password"></form>', url='https://dtm.example/login')
+        self.assertEqual(self.bot.check_session(force=True), SESSION_EXPIRED)
+        self.assertFalse(self.bot.is_session_valid())
+
+    def test_server_error_is_unknown(self):
+        self.stub(502, b'bad gateway')
+        self.assertEqual(self.bot.check_session(), SESSION_UNKNOWN)
+        self.assertFalse(self.bot.is_session_valid())
+
+    def test_network_error_is_unknown(self):
+        def request(method, path, **kwargs):
+            raise requests.ConnectionError('refused')
+        self.bot._request = request
+        self.assertEqual(self.bot.check_session(), SESSION_UNKNOWN)
+
+    def test_upstream_unavailable_is_raised(self):
+        def request(method, path, **kwargs):
+            raise UpstreamUnavailable('circuit open', 5)
+        self.bot._request = request
+        with self.assertRaises(UpstreamUnavailable):
+            self.bot.check_session()
+
+
+if __name__ == '__main__':
+    unittest.main()
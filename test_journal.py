@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the action journal's claim order and replay outcomes (no DTM server needed)
+
+    python -m pytest -q test_journal.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from dtm_journal import (
+    ACTION_DONE, ACTION_FAILED, ACTION_QUEUED, ACTION_RUNNING,
+    ActionAbandoned, ActionJournal, RetryAction
+)
+
+WHEN = {'when': '2025-11-13 05:00 PM'}
+
+
+class JournalTestCase(unittest.TestCase):
+    """A fresh journal file per test, with retries due immediately"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'actions.db')
+        self.journal = self.open_journal()
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def open_journal(self, **kwargs) -> ActionJournal:
+        options = {'max_attempts': 3, 'retry_base': 0, 'retry_max': 0}
+        options.update(kwargs)
+        return ActionJournal(self.path, **options)
+
+    def replay(self, handler) -> bool:
+        return self.journal.replay_one(handler)
+
+    def status(self, action):
+        return self.journal.get(action['id'])
+
+
+class ClaimOrderTest(JournalTestCase):
+
+    def test_session_actions_run_in_order(self):
+        first = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+        second = self.journal.enqueue('s1', 'u', 'pause', WHEN, 't2')
+        other = self.journal.enqueue('s2', 'v', 'end', WHEN, 't3')
+
+        claimed = self.journal.claim()
+        self.assertEqual(claimed['id'], first['id'])
+        # s1's next action waits for the running one; s2 is independent
+        self.assertEqual(self.journal.claim()['id'], other['id'])
+        self.assertIsNone(self.journal.claim())
+
+        self.journal.complete(first['id'], {'success': True})
+        self.assertEqual(self.journal.claim()['id'], second['id'])
+
+    def test_queued_retry_blocks_later_actions(self):
+        first = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+        self.journal.enqueue('s1', 'u', 'pause', WHEN, 't2')
+        self.journal.claim()
+        self.journal.retry(first['id'], 'down', delay=60)
+        self.assertIsNone(self.journal.claim())
+
+    def test_orphaned_running_action_is_reclaimed(self):
+        action = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+        self.assertEqual(self.journal.claim()['id'], action['id'])
+        self.assertIsNone(self.journal.claim())
+
+        # The worker died mid-send: a new process sees the row still running
+        self.journal.close()
+        self.journal = self.open_journal(lease=0.05)
+        self.assertEqual(self.status(action)['status'], ACTION_RUNNING)
+        time.sleep(0.1)
+        self.assertEqual(self.journal.claim()['id'], action['id'])
+
+
+class ReplayOutcomeTest(JournalTestCase):
+
+    def test_success_completes(self):
+        action = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+        self.assertTrue(self.replay(lambda a: {'success': True, 'task_id': a['task_id']}))
+        done = self.status(action)
+        self.assertEqual(done['status'], ACTION_DONE)
+        self.assertEqual(done['result'], {'success': True, 'task_id': 't1'})
+        self.assertFalse(self.replay(lambda a: {'success': True}))
+
+    def test_retry_without_attempt_keeps_attempts(self):
+        action = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+
+        def unavailable(a):
+            raise RetryAction('circuit open', retry_after=30)
+
+        for _ in range(self.journal.max_attempts + 1):
+            self.journal._conn.execute('UPDATE actions SET next_attempt_at = 0')
+            self.replay(unavailable)
+        queued = self.status(action)
+        self.assertEqual(queued['status'], ACTION_QUEUED)
+        self.assertEqual(queued['attempts'], 0)
+        self.assertGreater(queued['next_attempt_at'], time.time() + 20)
+
+    def test_retry_with_attempt_is_exhausted(self):
+        action = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+
+        def server_error(a):
+            raise RetryAction('HTTP 502', count_attempt=True)
+
+        for attempt in range(1, self.journal.max_attempts):
+            self.replay(server_error)
+            self.assertEqual(self.status(action)['status'], ACTION_QUEUED)
+            self.assertEqual(self.status(action)['attempts'], attempt)
+        self.replay(server_error)
+        failed = self.status(action)
+        self.assertEqual(failed['status'], ACTION_FAILED)
+        self.assertEqual(failed['error'], 'HTTP 502')
+
+    def test_unsuccessful_result_uses_attempts(self):
+        action = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+        for _ in range(self.journal.max_attempts):
+            self.replay(lambda a: {'success': False, 'message': 'nope'})
+        self.assertEqual(self.status(action)['status'], ACTION_FAILED)
+
+    def test_abandoned_fails_at_once_and_unblocks_session(self):
+        rejected = self.journal.enqueue('s1', 'u', 'end', WHEN, 'bogus')
+        later = self.journal.enqueue('s1', 'u', 'start', {'start_datetime': '2025-11-13T09:00:00'})
+
+        def handler(a):
+            if a['task_id'] == 'bogus':
+                raise ActionAbandoned('Task not found')
+            return {'success': True}
+
+        self.replay(handler)
+        failed = self.status(rejected)
+        self.assertEqual((failed['status'], failed['attempts'], failed['error']), (ACTION_FAILED, 0, 'Task not found'))
+        self.replay(handler)
+        self.assertEqual(self.status(later)['status'], ACTION_DONE)
+
+    def test_unexpected_error_is_retried(self):
+        action = self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+
+        def broken(a):
+            raise KeyError('when')
+
+        self.replay(broken)
+        queued = self.status(action)
+        self.assertEqual((queued['status'], queued['attempts']), (ACTION_QUEUED, 1))
+
+    def test_on_update_sees_new_state(self):
+        self.journal.enqueue('s1', 'u', 'end', WHEN, 't1')
+        updates = []
+        self.journal.replay_one(lambda a: {'success': True}, on_update=updates.append)
+        self.assertEqual([update['status'] for update in updates], [ACTION_DONE])
+
+
+if __name__ == '__main__':
+    unittest.main()
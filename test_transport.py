@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the upstream guard's circuit breaker (no DTM server needed)
+
+    python -m pytest -q test_transport.py
+"""
+
+import time
+import unittest
+
+import requests
+
+from dtm_transport import CircuitBreaker, TransportConfig, UpstreamGuard, UpstreamUnavailable
+
+
+def ok_response() -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    return response
+
+
+class HalfOpenTrialTest(unittest.TestCase):
+    """A half-open trial request is always resolved, whatever it raises"""
+
+    def setUp(self):
+        config = TransportConfig(rate_limit=0, max_in_flight=0, breaker_threshold=1, breaker_reset=0.01)
+        self.guard = UpstreamGuard('https://dtm.example', config)
+        with self.assertRaises(requests.ConnectionError):
+            self.guard.send(self.raise_(requests.ConnectionError('refused')), (503,))
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.02)
+
+    @staticmethod
+    def raise_(error):
+        def send():
+            raise error
+        return send
+
+    def test_request_exception_reopens_circuit(self):
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.guard.send(self.raise_(requests.exceptions.ChunkedEncodingError('cut')), (503,))
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.OPEN)
+
+        time.sleep(0.02)
+        self.assertEqual(self.guard.send(ok_response, (503,)).status_code, 200)
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_other_exception_frees_trial(self):
+        with self.assertRaises(KeyboardInterrupt):
+            self.guard.send(self.raise_(KeyboardInterrupt()), (503,))
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.HALF_OPEN)
+
+        # The next call is the trial instead of being rejected as "circuit open"
+        self.assertEqual(self.guard.send(ok_response, (503,)).status_code, 200)
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_trial_running_rejects_others(self):
+        self.assertTrue(self.guard.breaker.allow())
+        with self.assertRaises(UpstreamUnavailable):
+            self.guard.send(ok_response, (503,))
+
+
+if __name__ == '__main__':
+    unittest.main()
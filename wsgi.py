@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app
+
+# Some WSGI servers look for "application" by default
+application = app